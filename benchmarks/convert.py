@@ -0,0 +1,172 @@
+"""Measure row conversion throughput of the per-type converters
+
+Compares the converters built once per record type against the generic
+conversion they replaced, for reading WAPI rows into octoDNS values and
+writing octoDNS values back into WAPI payloads:
+
+    python benchmarks/convert.py --rows 100000 --types A TXT SRV
+"""
+
+import time
+import logging
+import argparse
+from collections import defaultdict
+
+from octodns.record import Record
+from octodns.zone import Zone
+from octoblox import InfoBloxProvider, dot_fields, dot_types, single_types, type_map
+from wapi import FakeWapi, Grid, mix, synthetic_zone
+
+ZONE = 'bench.example'
+
+
+def legacy_read(type, rows, default_ttl):
+    spec = type_map[type]
+    fields = (spec,) if isinstance(spec, str) else (*spec,)
+    single_field = isinstance(spec, str)
+    groups = defaultdict(lambda: ([], []))
+    for row in rows:
+        values, rl = groups[row['name']]
+        values.append(
+            {
+                k: (v + '.' if k in dot_fields else v)
+                for k, v in row.items()
+                if k in fields
+            }
+        )
+        rl.append(row)
+    return [
+        (
+            rl[0]['ttl'] if rl[0]['use_ttl'] else default_ttl,
+            name,
+            rl,
+            (
+                values[0][spec]
+                if type in single_types
+                else [
+                    v[spec] if single_field else {k: v[vk] for vk, k in spec.items()}
+                    for v in values
+                ]
+            ),
+        )
+        for name, (values, rl) in groups.items()
+    ]
+
+
+def legacy_write(type, value, ttl, default_ttl):
+    spec = type_map[type]
+    single_field = isinstance(spec, str)
+    return {
+        **(
+            {spec: value[:-1]}
+            if type in dot_types
+            else (
+                {spec: value}
+                if single_field
+                else {
+                    vk: (
+                        getattr(value, k)[:-1]
+                        if vk in dot_fields
+                        else getattr(value, k)
+                    )
+                    for vk, k in spec.items()
+                }
+            )
+        ),
+        'use_ttl': ttl != default_ttl,
+        'ttl': ttl,
+    }
+
+
+def read(provider, type, rows, default_ttl):
+    data = provider.conn.group_records(type, rows, default_ttl)
+    return [*provider._data_for(type, ZONE, default_ttl, False, data)]
+
+
+def write(provider, type, value, ttl, default_ttl):
+    return provider.conn.payload_value(type, value, ttl, default_ttl)
+
+
+def rate(func, count, repeat):
+    best = min(timed(func) for _ in range(repeat))
+    return count / best
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument(
+        '--types',
+        nargs='+',
+        default=['A', 'TXT', 'SRV'],
+        choices=[t for t, _ in mix if t not in single_types],
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    logging.basicConfig(level='ERROR')
+
+    with FakeWapi(Grid()) as wapi:
+        provider = InfoBloxProvider('bench', wapi.endpoint, 'admin', 'infoblox')
+    zone = Zone(f'{ZONE}.', [])
+    header = '{:<6} {:<6} {:>8} {:>14} {:>14} {:>8}'
+    print(header.format('type', 'path', 'rows', 'legacy (r/s)', 'typed (r/s)', 'gain'))
+    for type in args.types:
+        size = args.rows * sum(w for _, w in mix) // dict(mix)[type]
+        rows = synthetic_zone(ZONE, size)[type]
+        data = read(provider, type, rows, 3600)
+        assert data == legacy_read(type, rows, 3600)
+
+        values = [
+            v
+            for ttl, name, _, value in data
+            for v in Record.new(
+                zone,
+                name[: -len(ZONE) - 1],
+                {
+                    'type': type,
+                    'ttl': ttl,
+                    'values' if isinstance(value, list) else 'value': value,
+                },
+                lenient=True,
+            ).values
+        ]
+        assert [write(provider, type, v, 60, 3600) for v in values] == [
+            legacy_write(type, v, 60, 3600) for v in values
+        ]
+
+        for path, legacy, typed, count in (
+            (
+                'read',
+                lambda: legacy_read(type, rows, 3600),
+                lambda: read(provider, type, rows, 3600),
+                len(rows),
+            ),
+            (
+                'write',
+                lambda: [legacy_write(type, v, 60, 3600) for v in values],
+                lambda: [write(provider, type, v, 60, 3600) for v in values],
+                len(values),
+            ),
+        ):
+            before = rate(legacy, count, args.repeat)
+            after = rate(typed, count, args.repeat)
+            print(
+                header.format(
+                    type,
+                    path,
+                    count,
+                    f'{before:,.0f}',
+                    f'{after:,.0f}',
+                    f'{after / before:.2f}x',
+                )
+            )
+
+
+if __name__ == '__main__':
+    main()
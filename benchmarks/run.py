@@ -0,0 +1,137 @@
+"""Measure populate, plan and apply against a local WAPI stand-in
+
+Each configuration runs against a fresh grid served from a child process:
+
+    python benchmarks/run.py --records 1000 10000 --latency 0.002 \\
+        --config '' --config 'populate_workers=4,batch_size=100'
+
+Reports record sets, planned changes, wall time, WAPI requests (with how many
+of them fetched a follow-up page) and peak Python memory for each phase.
+"""
+
+import time
+import yaml
+import logging
+import argparse
+import requests
+import tracemalloc
+
+from octodns.zone import Zone
+from octodns.record import Record
+from octoblox import InfoBloxProvider
+from wapi import WapiProcess
+
+ZONE = 'bench.example.'
+
+
+def parse_config(config):
+    return {
+        k.strip(): yaml.safe_load(v)
+        for k, v in (i.split('=', 1) for i in config.split(',') if i.strip())
+    }
+
+
+def stats(endpoint, method='GET'):
+    return requests.request(method, f'{endpoint}/_stats').json()
+
+
+def measure(endpoint, func):
+    stats(endpoint, 'DELETE')
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    counts = stats(endpoint)
+    return result, {
+        'wall': wall,
+        'requests': sum(v for k, v in counts.items() if not k.startswith('pages/')),
+        'pages': sum(v for k, v in counts.items() if k.startswith('pages/')),
+        'peak': peak,
+    }
+
+
+def desired_zone(existing, changes):
+    """Copy existing, changing, dropping and adding a share of the records"""
+    desired = Zone(existing.name, [])
+    for i, record in enumerate(sorted(existing.records)):
+        if i % 100 < changes and record._type == 'A':
+            data = {'ttl': record.ttl, 'type': 'A', 'values': ['192.0.2.1']}
+        elif i % 100 < 2 * changes:
+            continue
+        else:
+            data = {**record.data, 'type': record._type}
+        desired.add_record(Record.new(desired, record.name, data, lenient=True))
+    for i in range(len(existing.records) * changes // 100):
+        desired.add_record(
+            Record.new(
+                desired, f'new{i}', {'ttl': 3600, 'type': 'A', 'value': '192.0.2.2'}
+            )
+        )
+    return desired
+
+
+def run(records, latency, config, changes):
+    with WapiProcess([(ZONE[:-1], records)], latency) as wapi:
+        provider = InfoBloxProvider(
+            'bench', wapi.endpoint, 'admin', 'infoblox', **parse_config(config)
+        )
+        existing = Zone(ZONE, [])
+        _, populate = measure(
+            wapi.endpoint, lambda: provider.populate(existing, lenient=True)
+        )
+        desired = desired_zone(existing, changes)
+        plan, planning = measure(wapi.endpoint, lambda: provider.plan(desired))
+        _, apply = measure(wapi.endpoint, lambda: provider.apply(plan))
+        return len(existing.records), len(plan.changes), populate, planning, apply
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--records', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds')
+    parser.add_argument(
+        '--changes', type=int, default=1, help='percent of records to change'
+    )
+    parser.add_argument(
+        '--config',
+        action='append',
+        help='comma separated provider options, repeat to compare',
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level='ERROR')
+
+    header = '{:>8} {:>8} {:<36} {:<8} {:>9} {:>9} {:>7} {:>10}'
+    print(
+        header.format(
+            'rrsets',
+            'changes',
+            'config',
+            'phase',
+            'wall (s)',
+            'requests',
+            'pages',
+            'peak (MB)',
+        )
+    )
+    for records in args.records:
+        for config in args.config or ['']:
+            sets, changes, *phases = run(records, args.latency, config, args.changes)
+            for name, m in zip(('populate', 'plan', 'apply'), phases):
+                print(
+                    header.format(
+                        sets,
+                        changes,
+                        config or '(defaults)',
+                        name,
+                        f'{m["wall"]:.3f}',
+                        m['requests'],
+                        m['pages'],
+                        f'{m["peak"] / 2**20:.1f}',
+                    )
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""In-process stand-in for the InfoBlox WAPI used by the benchmarks"""
+
+import json
+import time
+import uuid
+import threading
+import multiprocessing
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qsl, unquote
+
+from octoblox import type_map
+
+# fmt: off
+mix = (
+    ('A', 50),
+    ('AAAA', 10),
+    ('CNAME', 15),
+    ('TXT', 15),
+    ('MX', 5),
+    ('SRV', 5),
+)
+# fmt: on
+
+
+def synthetic_value(type, i):
+    if type == 'A':
+        return {'ipv4addr': f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}'}
+    if type == 'AAAA':
+        return {'ipv6addr': f'2001:db8::{i:x}'}
+    if type == 'CNAME':
+        return {'canonical': f'target{i}.example.net'}
+    if type == 'TXT':
+        return {'text': f'v=spf1 include:_spf{i}.example.net ~all'}
+    if type == 'MX':
+        return {'preference': 10, 'mail_exchanger': f'mx{i}.example.net'}
+    return {'priority': 10, 'weight': 5, 'port': 443, 'target': f'srv{i}.example.net'}
+
+
+def synthetic_zone(zone, size):
+    """Return record rows for a zone of roughly size records by type"""
+    total = sum(weight for _, weight in mix)
+    rows = {}
+    i = 0
+    for type, weight in mix:
+        rows[type] = []
+        for _ in range(size * weight // total):
+            prefix = '_sip._tcp.' if type == 'SRV' else ''
+            name = f'{prefix}{type.lower()}{i // 2 if type == "A" else i}.{zone}'
+            rows[type].append(
+                {
+                    '_ref': f'record:{type.lower()}/{uuid.uuid4().hex}:{name}/default',
+                    'name': name,
+                    'zone': zone,
+                    'view': 'default',
+                    'creator': 'STATIC',
+                    'ttl': 3600,
+                    'use_ttl': False,
+                    **synthetic_value(type, i),
+                }
+            )
+            i += 1
+    return rows
+
+
+class Grid:
+    """The state served by FakeWapi: zones, records and request counters"""
+
+    def __init__(self, latency=0.0, versions=('1.0', '2.5')):
+        self.latency = latency
+        self.versions = versions
+        self.zones = {}
+        self.records = {}
+        self.pages = {}
+        self.counts = Counter()
+        self.lock = threading.RLock()
+
+    def add_zone(self, zone, size=0, default_ttl=3600):
+        self.zones[zone] = {
+            '_ref': f'zone_auth/{uuid.uuid4().hex}:{zone}/default',
+            'fqdn': zone,
+            'view': 'default',
+            'soa_default_ttl': default_ttl,
+        }
+        for type, rows in synthetic_zone(zone, size).items():
+            for row in rows:
+                self.records[row['_ref']] = (type, row)
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+    def page(self, rows, max_results):
+        if len(rows) <= max_results:
+            return {'result': rows}
+        page_id = uuid.uuid4().hex
+        with self.lock:
+            self.pages[page_id] = (rows[max_results:], max_results)
+        return {'result': rows[:max_results], 'next_page_id': page_id}
+
+    def find(self, object, params):
+        with self.lock:
+            records = [*self.records.values()]
+        if '_page_id' in params:
+            with self.lock:
+                rows, max_results = self.pages.pop(params['_page_id'])
+            return self.page(rows, max_results)
+        if object in ('zone_auth', 'zone_delegated'):
+            rows = [
+                z
+                for z in self.zones.values()
+                if 'fqdn' not in params or z['fqdn'] == params['fqdn']
+            ]
+        elif object == 'allrecords':
+            rows = [
+                {'type': f'record:{t.lower()}', 'creator': r['creator'], 'record': r}
+                for t, r in records
+                if r['zone'] == params['zone']
+            ]
+        else:
+            type = object.split(':')[-1].upper()
+            rows = [
+                r
+                for t, r in records
+                if t == type
+                and r['zone'] == params.get('zone', r['zone'])
+                and r['name'] == params.get('name', r['name'])
+            ]
+        if '_paging' in params:
+            return self.page(rows, int(params.get('_max_results', 1000)))
+        return rows
+
+    def create(self, object, data):
+        if object in ('zone_auth', 'zone_delegated'):
+            self.add_zone(data['fqdn'])
+            return self.zones[data['fqdn']]
+        type = object.split(':')[-1].upper()
+        name = data['name']
+        zone = next(z for z in self.zones if f'.{name}'.endswith(f'.{z}'))
+        ref = f'{object}/{uuid.uuid4().hex}:{name}/default'
+        with self.lock:
+            self.records[ref] = (
+                type,
+                {'_ref': ref, 'zone': zone, 'creator': 'STATIC', **data},
+            )
+        return ref
+
+    def update(self, ref, data):
+        with self.lock:
+            self.records[ref][1].update(data)
+        return ref
+
+    def delete(self, ref):
+        with self.lock:
+            del self.records[ref]
+        return ref
+
+    def handle(self, method, object, params, data):
+        if method == 'GET' and object == '':
+            return {
+                'supported_versions': [*self.versions],
+                'supported_objects': [f'record:{t.lower()}' for t in type_map],
+            }
+        if method == 'GET':
+            return self.find(object, params)
+        if method == 'POST' and object == 'request':
+            return [
+                self.handle(op['method'], op['object'], {}, op.get('data'))
+                for op in data
+            ]
+        if method == 'POST':
+            return self.create(object, data)
+        if method == 'PUT':
+            return self.update(object, data)
+        return self.delete(object)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # send headers and body in one segment to avoid delayed ACK stalls
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    def stats(self, method):
+        grid = self.server.grid
+        with grid.lock:
+            body = json.dumps({'/'.join(k): v for k, v in grid.counts.items()})
+            if method == 'DELETE':
+                grid.counts.clear()
+        return body.encode(), 200
+
+    def respond(self, method):
+        grid = self.server.grid
+        url = urlparse(self.path)
+        if url.path == '/_stats':
+            self.reply(*self.stats(method))
+            return
+        object = unquote(url.path.split('/', 3)[-1])
+        params = dict(parse_qsl(url.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        data = json.loads(self.rfile.read(length)) if length else None
+        with grid.lock:
+            grid.counts[method, object.split('/')[0]] += 1
+            if '_page_id' in params:
+                grid.counts['pages', object] += 1
+        if grid.latency:
+            time.sleep(grid.latency)
+        try:
+            body = json.dumps(grid.handle(method, object, params, data)).encode()
+            status = 201 if method == 'POST' else 200
+        except (KeyError, StopIteration) as e:
+            body = json.dumps({'Error': repr(e)}).encode()
+            status = 404
+        self.reply(body, status)
+
+    def reply(self, body, status):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.respond('GET')
+
+    def do_POST(self):
+        self.respond('POST')
+
+    def do_PUT(self):
+        self.respond('PUT')
+
+    def do_DELETE(self):
+        self.respond('DELETE')
+
+
+class FakeWapi(ThreadingMixIn, HTTPServer):
+    """Serves a Grid over plain HTTP on a random local port"""
+
+    daemon_threads = True
+
+    def __init__(self, grid):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.grid = grid
+
+    @property
+    def endpoint(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def serve(zones, latency, pipe):
+    grid = Grid(latency)
+    for zone, size in zones:
+        grid.add_zone(zone, size)
+    server = FakeWapi(grid)
+    pipe.send(server.endpoint)
+    server.serve_forever()
+
+
+class WapiProcess:
+    """Runs a FakeWapi in a child process so it does not skew measurements"""
+
+    def __init__(self, zones, latency=0.0):
+        self.zones = zones
+        self.latency = latency
+
+    def __enter__(self):
+        parent, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=serve, args=(self.zones, self.latency, child), daemon=True
+        )
+        self.process.start()
+        self.endpoint = parent.recv()
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
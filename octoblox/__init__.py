@@ -1,11 +1,33 @@
+import io
+import os
+import csv
+import ssl
+import json
+import atexit
+import time
+import asyncio
+import hashlib
+import itertools
 import logging
+import random
+import ipaddress
 import requests
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from collections import defaultdict
-from functools import lru_cache
+from collections.abc import Set
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from octodns.provider.base import BaseProvider
 from octodns.source.base import BaseSource
 from octodns.record import Change, Record
 
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
 # fmt: off
 single_types = {'ALIAS', 'CNAME', 'PTR'}
 dot_types = single_types | {'NS'}
@@ -51,6 +73,166 @@ type_map = {
     'TXT': 'text',
 }
 # fmt: on
+# fmt: off
+csv_types = {
+    'A': ('arecord', {'ipv4addr': 'address'}),
+    'AAAA': ('aaaarecord', {'ipv6addr': 'address'}),
+    'CAA': ('caarecord', {
+        'ca_flag': 'ca_flag',
+        'ca_tag': 'ca_tag',
+        'ca_value': 'ca_value',
+    }),
+    'CNAME': ('cnamerecord', {'canonical': 'canonical_name'}),
+    'MX': ('mxrecord', {'mail_exchanger': 'mx', 'preference': 'priority'}),
+    'NAPTR': ('naptrrecord', {
+        'order': 'order',
+        'preference': 'preference',
+        'flags': 'flags',
+        'services': 'services',
+        'regexp': 'regexp',
+        'replacement': 'replacement',
+    }),
+    'PTR': ('ptrrecord', {'ptrdname': 'dname'}),
+    'SRV': ('srvrecord', {
+        'priority': 'priority',
+        'weight': 'weight',
+        'port': 'port',
+        'target': 'target',
+    }),
+    'TXT': ('txtrecord', {'text': 'text'}),
+}
+csv_done = {'COMPLETED', 'FAILED', 'STOPPED'}
+csv_numbers = {'ca_flag', 'order', 'port', 'preference', 'priority', 'weight'}
+# fmt: on
+populate_engines = {'record', 'allrecords', 'csv_export'}
+ref_fields = ('_ref', 'ttl', 'use_ttl', 'target_name', 'target_type')
+adapters = {}
+adapters_lock = threading.Lock()
+
+
+def shared_adapter(fqdn, username, password, pool_size):
+    """Return the process wide connection pool for a grid and credentials"""
+    key = (fqdn, username, hashlib.sha256(password.encode()).hexdigest())
+    with adapters_lock:
+        if key not in adapters:
+            adapters[key] = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=pool_size
+            )
+        return adapters[key]
+
+
+def type_fields(type):
+    spec = type_map[type]
+    return (spec,) if isinstance(spec, str) else (*spec,)
+
+
+def reader(type):
+    """Build the function turning a WAPI row into an octoDNS value"""
+    spec = type_map[type]
+    if type == 'ALIAS':
+        field = spec[0]
+        return lambda row: row[field] + '.'
+    if isinstance(spec, str):
+        if spec in dot_fields:
+            return lambda row: row[spec] + '.'
+        return lambda row: row[spec]
+    items = tuple((vk, k, vk in dot_fields) for vk, k in spec.items())
+    return lambda row: {k: row[vk] + '.' if dot else row[vk] for vk, k, dot in items}
+
+
+def writer(type, ttl=True):
+    """Build the function turning an octoDNS value and its TTL into a WAPI
+    payload, or into the value fields alone when ttl is false"""
+    spec = type_map[type]
+    # NS records take their TTL from the zone
+    if not ttl or type == 'NS':
+        if type == 'ALIAS':
+            return lambda value, *ttls: dict(value)
+        if isinstance(spec, str):
+            if type in dot_types:
+                return lambda value, *ttls: {spec: value[:-1]}
+            return lambda value, *ttls: {spec: value}
+        items = tuple((vk, k, vk in dot_fields) for vk, k in spec.items())
+        return lambda value, *ttls: {
+            vk: getattr(value, k)[:-1] if dot else getattr(value, k)
+            for vk, k, dot in items
+        }
+    if type == 'ALIAS':
+        return lambda value, ttl, default_ttl: {
+            **value,
+            'use_ttl': ttl != default_ttl,
+            'ttl': ttl,
+        }
+    if isinstance(spec, str):
+        if type in dot_types:
+            return lambda value, ttl, default_ttl: {
+                spec: value[:-1],
+                'use_ttl': ttl != default_ttl,
+                'ttl': ttl,
+            }
+        return lambda value, ttl, default_ttl: {
+            spec: value,
+            'use_ttl': ttl != default_ttl,
+            'ttl': ttl,
+        }
+    items = tuple((vk, k, vk in dot_fields) for vk, k in spec.items())
+
+    def write(value, ttl, default_ttl):
+        payload = {
+            vk: getattr(value, k)[:-1] if dot else getattr(value, k)
+            for vk, k, dot in items
+        }
+        payload['use_ttl'] = ttl != default_ttl
+        payload['ttl'] = ttl
+        return payload
+
+    return write
+
+
+readers = {t: reader(t) for t in type_map}
+writers = {t: writer(t) for t in type_map}
+field_writers = {t: writer(t, ttl=False) for t in type_map}
+
+
+def ref_name(ref):
+    """Return the record name embedded in a WAPI object reference"""
+    return ref.split(':', 2)[-1].rsplit('/', 1)[0]
+
+
+def group_changes(changes):
+    """Group changes by record name keeping the order within each name"""
+    groups = {}
+    for change in changes:
+        groups.setdefault(change.record.name, []).append(change)
+    # deletes go first so a name can switch between CNAME and other types
+    return [
+        sorted(g, key=lambda c: c.__class__.__name__ != 'Delete')
+        for g in groups.values()
+    ]
+
+
+def check_failures(log, groups, results):
+    """Raise ApplyError for the groups of changes whose result is an error"""
+    failures = [
+        (changes[0].record.name, result)
+        for changes, result in zip(groups, results)
+        if isinstance(result, Exception)
+    ]
+    for name, error in failures:
+        log.error('apply: changes to %r failed: %s', name, error)
+    if failures:
+        raise ApplyError(failures)
+
+
+class ApplyError(Exception):
+    """Changes to some record names failed while the rest were applied"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(
+            f'changes to {len(failures)} names failed: '
+            + ', '.join(f'{name!r} ({error})' for name, error in failures)
+        )
 
 
 class Create(Change):
@@ -66,6 +248,333 @@ class Create(Change):
         return f'Create Zone {self.new.fqdn} ({source})'
 
 
+class FileCache:
+    """JSON documents kept on disk for a limited time"""
+
+    def __init__(self, path, ttl=None, max_size=None):
+        self.path = Path(path).expanduser()
+        self.ttl = ttl
+        self.max_size = max_size
+        # entry sizes oldest first, the directory is only scanned once
+        self.sizes = None
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def file(self, key):
+        return self.path / (hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def get(self, key):
+        try:
+            with open(self.file(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('key') != key or (
+            self.ttl is not None and time.time() - entry['time'] >= self.ttl
+        ):
+            self.delete(key)
+            return None
+        return entry['data']
+
+    def set(self, key, data):
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self.file(key)
+        tmp = file.with_name(f'{file.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        text = json.dumps({'key': key, 'time': time.time(), 'data': data})
+        with open(tmp, 'w') as f:
+            f.write(text)
+        os.replace(tmp, file)
+        if self.max_size is not None:
+            self.prune(file, len(text))
+
+    def scan(self):
+        entries = []
+        for file in self.path.glob('*.json'):
+            try:
+                stat = file.stat()
+            except FileNotFoundError:  # pragma: no cover
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+        self.sizes = {file: size for _, size, file in sorted(entries)}
+        self.size = sum(self.sizes.values())
+
+    def prune(self, file, size):
+        """Count a written entry and remove the oldest ones beyond max_size bytes"""
+        with self.lock:
+            if self.sizes is None:
+                self.scan()
+            self.size += size - self.sizes.pop(file, 0)
+            self.sizes[file] = size
+            while self.size > self.max_size:
+                oldest = next(iter(self.sizes))
+                self.size -= self.sizes.pop(oldest)
+                try:
+                    os.remove(oldest)
+                except FileNotFoundError:  # pragma: no cover
+                    pass
+
+    def delete(self, key):
+        file = self.file(key)
+        try:
+            os.remove(file)
+        except FileNotFoundError:
+            pass
+        with self.lock:
+            if self.sizes is not None:
+                self.size -= self.sizes.pop(file, 0)
+
+
+def compact_row(row):
+    """Return the fields of a WAPI row that refs are built from"""
+    return {k: row[k] for k in ref_fields if k in row}
+
+
+class Ref:
+    """The parts of a WAPI record object needed to modify or delete it"""
+
+    __slots__ = ('ref', 'value', 'ttl', 'target_type')
+
+    def __init__(self, ref, value, ttl=None, target_type=None):
+        self.ref = ref
+        self.value = value
+        self.ttl = ttl
+        self.target_type = target_type
+
+    def __repr__(self):
+        return f'Ref({self.ref!r})'
+
+
+class Metrics:
+    """Request counts, bytes and latency histograms per method and object"""
+
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def entry(self, method, url):
+        if '/wapi/v' in url:
+            url = url.split('/wapi/v', 1)[1].split('/', 1)[1]
+        object = 'file' if '://' in url else url.split('?')[0].split('/')[0]
+        key = (method, object or 'schema')
+        if key not in self.stats:
+            self.stats[key] = {
+                'requests': 0,
+                'errors': 0,
+                'pages': 0,
+                'retries': 0,
+                'hedges': 0,
+                'sent': 0,
+                'received': 0,
+                'seconds': 0.0,
+                'histogram': [0] * (len(self.buckets) + 1),
+            }
+        return self.stats[key]
+
+    def observe(self, method, url, seconds, status, sent, received, page=False):
+        bucket = next(
+            (i for i, b in enumerate(self.buckets) if seconds <= b), len(self.buckets)
+        )
+        with self.lock:
+            entry = self.entry(method, url)
+            entry['requests'] += 1
+            entry['errors'] += status >= 400
+            entry['pages'] += page
+            entry['sent'] += sent
+            entry['received'] += received
+            entry['seconds'] += seconds
+            entry['histogram'][bucket] += 1
+
+    def retry(self, method, url):
+        with self.lock:
+            self.entry(method, url)['retries'] += 1
+
+    def hedge(self, method, url):
+        with self.lock:
+            self.entry(method, url)['hedges'] += 1
+
+    def summary(self):
+        with self.lock:
+            return {
+                f'{method} {object}': {**entry, 'histogram': [*entry['histogram']]}
+                for (method, object), entry in sorted(self.stats.items())
+            }
+
+    def quantile(self, histogram, q):
+        rank = q * sum(histogram)
+        for bound, count in zip(self.buckets + (float('inf'),), histogram):
+            rank -= count
+            if rank <= 0:
+                return bound
+
+    def report(self, log):
+        for key, entry in self.summary().items():
+            log.info(
+                'metrics: %s requests=%d errors=%d pages=%d retries=%d hedges=%d '
+                'sent=%d received=%d seconds=%.3f p50<=%ss p95<=%ss',
+                key,
+                entry['requests'],
+                entry['errors'],
+                entry['pages'],
+                entry['retries'],
+                entry['hedges'],
+                entry['sent'],
+                entry['received'],
+                entry['seconds'],
+                self.quantile(entry['histogram'], 0.5),
+                self.quantile(entry['histogram'], 0.95),
+            )
+
+
+class Throttle:
+    """Token bucket, adaptive concurrency limit and retry policy for requests"""
+
+    # rejected before the grid acted on them, so even writes can be retried
+    throttled = {429, 503}
+    transient = {429, 502, 503, 504}
+
+    def __init__(
+        self,
+        rate=None,
+        burst=None,
+        concurrency=None,
+        latency_target=None,
+        max_retries=3,
+        backoff=0.5,
+        backoff_max=30,
+    ):
+        self.rate = rate
+        self.burst = burst or max(1, rate or 1)
+        self.tokens = self.burst
+        self.filled = time.monotonic()
+        self.concurrency = concurrency
+        self.limit = concurrency
+        self.active = 0
+        self.decreased = 0
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.cond = threading.Condition()
+        self.waiters = []
+
+    def admit(self):
+        """Refill the bucket, return 0 when a request can start, the seconds until
+        the next token, or None until a slot is released"""
+        if self.rate:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.filled) * self.rate)
+            self.filled = now
+        if self.limit and self.active >= int(self.limit):
+            return None
+        if self.rate and self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0
+
+    def start(self):
+        if self.rate:
+            self.tokens -= 1
+        self.active += 1
+        return time.monotonic()
+
+    def acquire(self):
+        """Wait for a request slot and token, return when the request started"""
+        with self.cond:
+            # the checks repeat after every wait, other threads may have run
+            while True:
+                wait = self.admit()
+                if wait == 0:
+                    return self.start()
+                self.cond.wait(wait)
+
+    async def acquire_async(self):
+        """Like acquire, without blocking the event loop while waiting"""
+        loop = asyncio.get_event_loop()
+        while True:
+            with self.cond:
+                wait = self.admit()
+                if wait == 0:
+                    return self.start()
+                waiter = loop.create_future()
+                self.waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, started, congested):
+        """Free the slot and adapt the limit: add one per window, halve on congestion"""
+        with self.cond:
+            self.active -= 1
+            if self.limit:
+                congested = congested or (
+                    self.latency_target is not None
+                    and time.monotonic() - started > self.latency_target
+                )
+                # requests sent before the last decrease saw the old limit
+                if congested and started >= self.decreased:
+                    self.limit = max(1, self.limit / 2)
+                    self.decreased = time.monotonic()
+                elif not congested:
+                    self.limit = min(self.concurrency, self.limit + 1 / self.limit)
+            self.cond.notify_all()
+            for loop, waiter in self.waiters:
+                loop.call_soon_threadsafe(self.wake, waiter)
+            self.waiters = []
+
+    @staticmethod
+    def wake(waiter):
+        # a waiter whose wait timed out was cancelled already
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def retryable(self, method, status):
+        if method == 'GET':
+            return status in self.transient
+        return status in self.throttled
+
+    def delay(self, attempt, retry_after=None):
+        """Return the jittered exponential backoff, at least Retry-After"""
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff * 2**attempt))
+        return max(backoff, self.retry_after(retry_after))
+
+    def retry_after(self, value):
+        if not value:
+            return 0
+        try:
+            return min(self.backoff_max, max(0, float(value)))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+        return min(self.backoff_max, max(0, seconds))
+
+
+def summarize_uploads(kwargs):
+    """Replace uploaded files with their size, a CSV import holds whole zones"""
+    if not kwargs.get('files'):
+        return kwargs
+    files = {}
+    for field, (name, data, *_) in kwargs['files'].items():
+        if isinstance(data, str):
+            data = data.encode()
+        rows = len(data.splitlines())
+        files[field] = f'{name} ({rows} rows, {len(data)} bytes)'
+    return {**kwargs, 'files': files}
+
+
+def encode_json(data):
+    return json.dumps(data).encode()
+
+
+def decode_json(content):
+    return json.loads(content)
+
+
 class InfoBlox(requests.Session):
     """Encapsulates all traffic with the InfoBlox WAPI"""
 
@@ -81,27 +590,156 @@ class InfoBlox(requests.Session):
         log_change=False,
         new_zone_fields=None,
         log=None,
+        batch_size=None,
+        max_results=1000,
+        schema_cache=None,
+        schema_cache_ttl=86400,
+        pool_size=10,
+        keep_alive=True,
+        connect_timeout=None,
+        read_timeout=None,
+        zone_inventory=False,
+        defer_restart=False,
+        read_endpoints=None,
+        hedge_after=None,
+        throttle=None,
     ):
         super(InfoBlox, self).__init__()
         self.fqdn = fqdn
+        self.base = fqdn if '://' in fqdn else f'https://{fqdn}'
         self.auth = (username, password)
         self.dns_view = dns_view
         self.alias_types = {*alias_types} if alias_types else {'A', 'AAAA'}
         self.verify = verify
-        self.apiver = apiver or '1.0'
+        self.mount(f'{self.base}/', shared_adapter(fqdn, username, password, pool_size))
+        # reads rotate over the read endpoints, writes always go to the master
+        self.read_bases = [
+            e if '://' in e else f'https://{e}' for e in read_endpoints or ()
+        ] or [self.base]
+        for endpoint, base in zip(read_endpoints or (), self.read_bases):
+            self.mount(
+                f'{base}/', shared_adapter(endpoint, username, password, pool_size)
+            )
+        self.reads = itertools.count()
+        self.hedge_after = hedge_after
+        self.hedging = (
+            ThreadPoolExecutor(max_workers=pool_size)
+            if hedge_after and len(self.read_bases) > 1
+            else None
+        )
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+        self.timeout = (
+            (connect_timeout, read_timeout) if connect_timeout or read_timeout else None
+        )
+        self._apiver = apiver
+        self.discovery = threading.RLock()
         self.log_change = log_change
         self.new_zone_fields = new_zone_fields or {}
+        self.defer_restart = defer_restart
+        self.csv_poll_interval = 2
+        self.restart_zones = set()
         self.log = log
-        if not apiver:  # pragma: no branch
-            self.apiver = self.get_api_version()
+        self.batch_size = batch_size
+        # sessions, queued batches and captures are kept per thread
+        self.local = threading.local()
+        self.lock = threading.RLock()
+        self.metrics = Metrics()
+        self.throttle = throttle or Throttle()
+        self.max_results = max_results
+        self.zone_inventory = zone_inventory
+        self.inventories = {}
+        self.changes = {}
+        self.sequence_ids = {}
+        self.schemas = {}
+        self.supported_types = None
+        self.schema_cache = (
+            FileCache(schema_cache, schema_cache_ttl) if schema_cache else None
+        )
+
+    @property
+    def apiver(self):
+        # discovered on first use so constructing a provider stays offline
+        if self._apiver is None:
+            with self.discovery:
+                if self._apiver is None:
+                    self._apiver = self.get_api_version()
+        return self._apiver
 
-    def url(self, url):
-        return f'https://{self.fqdn}/wapi/v{self.apiver}/{url}'
+    @property
+    def batch(self):
+        if not hasattr(self.local, 'batch'):
+            self.local.batch = []
+        return self.local.batch
+
+    @batch.setter
+    def batch(self, batch):
+        self.local.batch = batch
+
+    @property
+    def captured(self):
+        return getattr(self.local, 'captured', None)
+
+    @captured.setter
+    def captured(self, captured):
+        self.local.captured = captured
+
+    def session(self):
+        """Return the session of the calling thread, sharing this connection pool"""
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            session.auth = self.auth
+            session.verify = self.verify
+            session.headers.update(self.headers)
+            for prefix, adapter in self.adapters.items():
+                session.mount(prefix, adapter)
+        return session
+
+    def url(self, url, base=None):
+        if '://' in url:
+            return url
+        return f'{base or self.base}/wapi/v{self.apiver}/{url}'
+
+    def read_base(self):
+        return self.read_bases[next(self.reads) % len(self.read_bases)]
+
+    def fetch(self, url, kwargs):
+        return self.session().request('GET', url, **kwargs)
+
+    def read(self, url, kwargs):
+        """GET url from the next read endpoint, hedged on the one after it"""
+        n = next(self.reads)
+        first = self.url(url, self.read_bases[n % len(self.read_bases)])
+        if not self.hedging:
+            return self.fetch(first, kwargs)
+        futures = [self.hedging.submit(self.fetch, first, kwargs)]
+        done, _ = wait(futures, self.hedge_after)
+        if not done:
+            self.metrics.hedge('GET', url)
+            second = self.url(url, self.read_bases[(n + 1) % len(self.read_bases)])
+            futures.append(self.hedging.submit(self.fetch, second, kwargs))
+        for future in as_completed(futures):
+            try:
+                return future.result()
+            except requests.RequestException as e:
+                error = e
+        raise error
 
     def request(self, method, url, **kwargs):
         if self.log_change and method not in ('GET', 'HEAD'):
-            self.log.info(f'{method} {url} {kwargs}')
-        ret = super().request(method, self.url(url), **kwargs)
+            self.log.info(f'{method} {url} {summarize_uploads(kwargs)}')
+        if self.timeout:
+            kwargs.setdefault('timeout', self.timeout)
+        for attempt in itertools.count():
+            ret, delay = self.attempt(method, url, kwargs, attempt)
+            if delay is None:
+                break
+            self.metrics.retry(method, url)
+            self.log.warning(
+                'InfoBlox.request: retrying %s %s in %.2fs', method, url, delay
+            )
+            time.sleep(delay)
         try:
             ret.raise_for_status()
         except requests.HTTPError:  # pragma: no cover
@@ -110,17 +748,90 @@ class InfoBlox(requests.Session):
                 ret.status_code,
                 method,
                 url,
-                kwargs,
+                summarize_uploads(kwargs),
                 ret.text,
             )
             raise
         return ret
 
+    def attempt(self, method, url, kwargs, attempt):
+        """Send one try of a request, return it and the delay before a retry"""
+        throttle = self.throttle
+        retry = attempt < throttle.max_retries
+        started = throttle.acquire()
+        start = time.perf_counter()
+        try:
+            if method == 'GET' and '://' not in url:
+                ret = self.read(url, kwargs)
+            else:
+                ret = self.session().request(method, self.url(url), **kwargs)
+        except requests.ConnectionError:
+            throttle.release(started, True)
+            # a write may have reached the grid before the connection broke
+            if not retry or method != 'GET':
+                raise
+            return None, throttle.delay(attempt)
+        throttle.release(started, ret.status_code in throttle.transient)
+        self.metrics.observe(
+            method,
+            url,
+            time.perf_counter() - start,
+            ret.status_code,
+            len(ret.request.body or b''),
+            # reading a streamed body here would load it into memory
+            (
+                int(ret.headers.get('Content-Length') or 0)
+                if kwargs.get('stream')
+                else len(ret.content)
+            ),
+            '_page_id' in (kwargs.get('params') or {}),
+        )
+        if not retry or not throttle.retryable(method, ret.status_code):
+            return ret, None
+        ret.close()
+        return ret, throttle.delay(attempt, ret.headers.get('Retry-After'))
+
+    def schema_key(self, apiver):
+        return f'{self.fqdn}/{self.dns_view or ""}/v{apiver}'
+
+    def get_schema(self, apiver=None):
+        apiver = apiver or self.apiver
+        key = self.schema_key(apiver)
+        with self.discovery:
+            if key not in self.schemas:
+                schema = self.schema_cache.get(key) if self.schema_cache else None
+                if schema is None:
+                    schema = self.get(f'{self.base}/wapi/v{apiver}/?_schema').json()
+                    if self.schema_cache:
+                        self.schema_cache.set(key, schema)
+                self.schemas[key] = schema
+            return self.schemas[key]
+
+    def invalidate_schema(self):
+        with self.discovery:
+            self.supported_types = None
+            for key in {self.schema_key('1.0'), self.schema_key(self._apiver or '1.0')}:
+                self.schemas.pop(key, None)
+                if self.schema_cache:
+                    self.schema_cache.delete(key)
+
     def get_api_version(self):
-        vers = self.get('?_schema').json()['supported_versions']
+        vers = self.get_schema('1.0')['supported_versions']
         vers = ([int(i) for i in v.split('.')] for v in vers)
         return '.'.join(str(i) for i in sorted(vers)[-1])
 
+    def get_supported_types(self):
+        types = self.supported_types
+        if types is not None:
+            return types
+        with self.discovery:
+            if self.supported_types is None:
+                supported_objects = self.get_schema()['supported_objects']
+                self.supported_types = frozenset(
+                    t for t in type_map if f'record:{t.lower()}' in supported_objects
+                )
+            return self.supported_types
+
     def get_zone_fqdn(self, zone):
         if zone.endswith('in-addr.arpa.'):
             return '{0}/{1}'.format(
@@ -140,100 +851,273 @@ class InfoBlox(requests.Session):
         else:
             return zone[:-1]
 
-    def get_zone(self, zone, zone_type='zone_auth', return_fields='soa_default_ttl'):
-        return self.get(
-            zone_type,
-            params={
-                'fqdn': self.get_zone_fqdn(zone),
-                '_return_fields+': return_fields,
-                **({'view': self.dns_view} if self.dns_view else {}),
-            },
-        ).json()
+    def zone_params(self, zone, return_fields):
+        return {
+            'fqdn': self.get_zone_fqdn(zone),
+            '_return_fields+': return_fields,
+            **({'view': self.dns_view} if self.dns_view else {}),
+        }
 
-    def add_zone(self, zone, zone_type='zone_auth', return_fields='soa_default_ttl'):
+    def zone_payload(self, zone, return_fields):
         fqdn = self.get_zone_fqdn(zone)
         zone_format = 'IPV6' if ':' in fqdn else 'IPV4' if '/' in fqdn else 'FORWARD'
-        return self.post(
-            zone_type,
+        fields = self.new_zone_fields
+        if self.defer_restart and fields.get('restart_if_needed'):
+            # the zone is created without a restart, restart_services runs later
+            fields = {k: v for k, v in fields.items() if k != 'restart_if_needed'}
+            with self.lock:
+                self.restart_zones.add(zone)
+        return {
+            'fqdn': fqdn,
+            'zone_format': zone_format,
+            '_return_fields+': return_fields,
+            **fields,
+        }
+
+    def restart_services(self):
+        """Restart grid services once for all zones created without a restart"""
+        with self.lock:
+            zones = {*self.restart_zones}
+        if not zones:
+            return
+        grid = self.get('grid').json()[0]['_ref']
+        self.log.info(
+            'restart_services: restarting services of %s for %d zones', grid, len(zones)
+        )
+        self.post(
+            grid,
+            params={'_function': 'restartservices'},
             json={
-                'fqdn': fqdn,
-                'zone_format': zone_format,
-                '_return_fields+': return_fields,
-                **self.new_zone_fields,
+                'restart_option': 'RESTART_IF_NEEDED',
+                'member_order': 'SIMULTANEOUSLY',
+                'service_option': 'DNS',
             },
-        ).json()
+        )
+        # zones created meanwhile still wait for the next restart
+        with self.lock:
+            self.restart_zones -= zones
+
+    def zone_key(self, fqdn):
+        if '/' in fqdn:
+            return str(ipaddress.ip_network(fqdn, strict=False))
+        return fqdn.lower()
+
+    def inventory_params(self, return_fields):
+        return {
+            '_return_fields+': f'fqdn,{return_fields}',
+            **({'view': self.dns_view} if self.dns_view else {}),
+        }
+
+    def index_zones(self, zone_type, return_fields, rows):
+        inventory = self.inventories[zone_type, return_fields] = {}
+        for row in rows:
+            inventory[self.zone_key(row['fqdn'])] = [row]
+        return inventory
+
+    def add_to_inventory(self, zone_type, row):
+        with self.lock:
+            for (inventory_type, _), inventory in self.inventories.items():
+                if inventory_type == zone_type:
+                    inventory[self.zone_key(row['fqdn'])] = [row]
+        return row
+
+    def get_inventory(self, zone_type, return_fields):
+        with self.lock:
+            inventory = self.inventories.get((zone_type, return_fields))
+            if inventory is None:
+                inventory = self.index_zones(
+                    zone_type,
+                    return_fields,
+                    self.get_paged(zone_type, self.inventory_params(return_fields)),
+                )
+            return inventory
+
+    def get_zone(self, zone, zone_type='zone_auth', return_fields='soa_default_ttl'):
+        if self.zone_inventory:
+            inventory = self.get_inventory(zone_type, return_fields)
+            return inventory.get(self.zone_key(self.get_zone_fqdn(zone)), [])
+        return self.get(zone_type, params=self.zone_params(zone, return_fields)).json()
+
+    def add_zone(self, zone, zone_type='zone_auth', return_fields='soa_default_ttl'):
+        return self.add_to_inventory(
+            zone_type,
+            self.post(zone_type, json=self.zone_payload(zone, return_fields)).json(),
+        )
+
+    def paged_params(self, params):
+        return {
+            **params,
+            '_paging': 1,
+            '_max_results': self.max_results,
+            '_return_as_object': 1,
+        }
+
+    def get_paged(self, object, params):
+        ret = self.get(object, params=self.paged_params(params))
+        # page ids are only valid on the member that handed them out
+        url = ret.url.split('?')[0]
+        ret = ret.json()
+        yield from ret['result']
+        while 'next_page_id' in ret:
+            ret = self.get(url, params={'_page_id': ret['next_page_id']}).json()
+            yield from ret['result']
+
+    def records_params(self, type, fields, zone, **extra):
+        return {
+            'zone': zone.rstrip('.'),
+            **extra,
+            '_return_fields+': ','.join(
+                (() if type == 'NS' else ('ttl', 'use_ttl')) + fields + ('name',)
+            ),
+            **({'creator': 'STATIC'} if type != 'ALIAS' else {}),
+            **({'view': self.dns_view} if self.dns_view else {}),
+        }
 
     def get_records(self, type, fields, zone, default_ttl, **extra):
-        ret = self.get(
-            'record:{0}'.format(type.lower()),
-            params={
+        return self.group_records(
+            type,
+            self.get_paged(
+                'record:{0}'.format(type.lower()),
+                self.records_params(type, fields, zone, **extra),
+            ),
+            default_ttl,
+        )
+
+    def get_sequence_id(self, types):
+        """Return the newest db_objects sequence id for the record types"""
+        key = (*types,)
+        with self.lock:
+            # changes read this run end at a current id, only without them is
+            # the whole history walked, and then once per run
+            known = [new for (_, *t), (new, _) in self.changes.items() if t == [*key]]
+            if known:
+                return max(known, key=int)
+            if key not in self.sequence_ids:
+                sequence_id = '0'
+                for d in self.get_paged(
+                    'db_objects',
+                    {
+                        'start_sequence_id': '0',
+                        'object_types': ','.join(f'record:{t.lower()}' for t in types),
+                        '_return_fields': 'last_sequence_id',
+                    },
+                ):
+                    sequence_id = d['last_sequence_id']
+                self.sequence_ids[key] = sequence_id
+            return self.sequence_ids[key]
+
+    def get_changes(self, sequence_id, types):
+        """Return the objects changed since sequence_id and the new sequence id"""
+        key = (sequence_id, *types)
+        with self.lock:
+            if key not in self.changes:
+                rows = [
+                    *self.get_paged(
+                        'db_objects',
+                        {
+                            'start_sequence_id': sequence_id,
+                            'object_types': ','.join(
+                                f'record:{t.lower()}' for t in types
+                            ),
+                            '_return_fields': 'last_sequence_id,object,object_type',
+                        },
+                    )
+                ]
+                self.changes[key] = (
+                    rows[-1]['last_sequence_id'] if rows else sequence_id,
+                    rows,
+                )
+            return self.changes[key]
+
+    def get_all_records(self, zone, types, default_ttl):
+        fields = {f for fs in types.values() for f in fs} | {'ttl', 'use_ttl', 'name'}
+        groups = {t: defaultdict(lambda: ([], [])) for t in types}
+        for d in self.get_paged(
+            'allrecords',
+            {
                 'zone': zone.rstrip('.'),
-                **extra,
                 '_return_fields+': ','.join(
-                    (() if type == 'NS' else ('ttl', 'use_ttl')) + fields + ('name',)
+                    ('type', 'creator', 'record')
+                    + tuple(f'record.{f}' for f in sorted(fields))
                 ),
-                '_paging': 1,
-                '_max_results': 1000,
-                '_return_as_object': 1,
-                **({'creator': 'STATIC'} if type != 'ALIAS' else {}),
                 **({'view': self.dns_view} if self.dns_view else {}),
             },
-        ).json()
-        data = ret['result']
-        while 'next_page_id' in ret:  # pragma: no cover
-            ret = self.get(
-                'record:{0}'.format(type.lower()),
-                params={'_page_id': ret['next_page_id']},
-            ).json()
-            data += ret['result']
-        dd = defaultdict(list)
-        for d in data:
-            dd[d['name']].append(d)
-        return [
-            (
+        ):
+            type = d['type'].split(':')[-1].upper()
+            if type in groups and (type == 'ALIAS' or d.get('creator') == 'STATIC'):
+                self.group_row(groups[type], type, d['record'])
+        return {t: self.grouped(t, g, default_ttl) for t, g in groups.items()}
+
+    def group_records(self, type, rows, default_ttl):
+        groups = defaultdict(lambda: ([], []))
+        for d in rows:
+            self.group_row(groups, type, d)
+        return self.grouped(type, groups, default_ttl)
+
+    def group_row(self, groups, type, row):
+        values, rows = groups[row['name']]
+        values.append(readers[type](row))
+        rows.append(row)
+
+    def grouped(self, type, groups, default_ttl):
+        for n, (values, rl) in groups.items():
+            yield (
                 rl[0]['ttl'] if type != 'NS' and rl[0]['use_ttl'] else default_ttl,
                 n,
-                [
-                    {
-                        k: (v + '.' if k in dot_fields else v)
-                        for k, v in r.items()
-                        if k in fields
-                    }
-                    for r in rl
-                ],
                 rl,
+                values,
             )
-            for n, rl in dd.items()
-            if rl
-        ]
 
     def payload_value(self, type, value, ttl, default_ttl):
-        spec = type_map[type]
-        single_field = isinstance(spec, str)
-        return {
-            **(
-                value
-                if type == 'ALIAS'
-                else {spec: value[:-1]}
-                if type in dot_types
-                else {spec: value}
-                if single_field
-                else {
-                    vk: (
-                        getattr(value, k)[:-1]
-                        if vk in dot_fields
-                        else getattr(value, k)
-                    )
-                    for vk, k in spec.items()
-                }
-            ),
-            **({} if type == 'NS' else {'use_ttl': ttl != default_ttl, 'ttl': ttl}),
+        return writers[type](value, ttl, default_ttl)
+
+    def submit(self, method, object, data=None):
+        op = {
+            'method': method,
+            'object': object,
+            **({} if data is None else {'data': data}),
         }
+        if self.captured is not None:
+            self.captured.append(op)
+        elif not self.batch_size:
+            self.dispatch(op)
+        else:
+            self.batch.append(op)
+            if len(self.batch) >= self.batch_size:
+                self.flush()
+
+    def dispatch(self, op):
+        self.request(
+            op['method'], op['object'], **({'json': op['data']} if 'data' in op else {})
+        )
+
+    def capture(self, func, *args):
+        """Return the operations func would submit instead of sending them"""
+        self.captured = []
+        try:
+            func(*args)
+            return self.captured
+        finally:
+            self.captured = None
+
+    def flush(self):
+        batch, self.batch = self.batch, []
+        if not batch:
+            return
+        try:
+            self.post('request', json=batch)
+        except requests.HTTPError:
+            # the request object runs as a single transaction so nothing from
+            # the failed chunk was applied, replay it to pinpoint the failure
+            self.log.warning('flush: replaying %d operations', len(batch))
+            for op in batch:
+                self.dispatch(op)
 
     def add_record(self, type, zone, name, value, ttl, default_ttl):
-        self.post(
+        self.submit(
+            'POST',
             f'record:{type.lower()}',
-            json={
+            {
                 'name': f'{name}.{zone}',
                 **self.payload_value(type, value, ttl, default_ttl),
                 **({'view': self.dns_view} if self.dns_view else {}),
@@ -241,11 +1125,312 @@ class InfoBlox(requests.Session):
         )
 
     def mod_record(self, type, src, value, ttl, default_ttl):
-        self.put(src['_ref'], json=self.payload_value(type, value, ttl, default_ttl))
+        self.submit('PUT', src.ref, self.payload_value(type, value, ttl, default_ttl))
 
     def del_record(self, source):
         for src in source:
-            self.delete(src['_ref'])
+            self.submit('DELETE', src.ref)
+
+    def fileop(self, function, data):
+        return self.post('fileop', params={'_function': function}, json=data).json()
+
+    def csv_header(self, type):
+        object, columns = csv_types[type]
+        return [
+            f'header-{object}',
+            'IMPORT-ACTION',
+            'fqdn*',
+            *(f'{c}*' for c in columns.values()),
+            'ttl',
+            'view',
+        ]
+
+    def csv_row(self, type, action, name, fields):
+        object, columns = csv_types[type]
+        return [
+            object,
+            action,
+            name,
+            *(fields[f] for f in columns),
+            fields['ttl'] if fields.get('use_ttl') else '',
+            self.dns_view or '',
+        ]
+
+    def get_export(self, type, zone):
+        """Export the records of a type in a zone as CSV and stream the rows"""
+        export = self.fileop(
+            'csv_export',
+            {
+                '_object': f'record:{type.lower()}',
+                'zone': zone.rstrip('.'),
+                **({'view': self.dns_view} if self.dns_view else {}),
+            },
+        )
+        ret = self.get(export['url'], stream=True)
+        ret.encoding = ret.encoding or 'utf-8'
+        return self.exported(type, ret, export['token'])
+
+    def exported(self, type, ret, token):
+        object, columns = csv_types[type]
+        header = None
+        try:
+            for row in csv.reader(ret.iter_lines(decode_unicode=True)):
+                if not row:
+                    continue
+                if row[0].lower().startswith('header-'):
+                    header = [c.rstrip('*').lower() for c in row]
+                    continue
+                data = dict(zip(header, row))
+                if row[0].lower() != object or (
+                    data.get('creator', 'STATIC').upper() != 'STATIC'
+                ):
+                    continue
+                yield {
+                    'name': data['fqdn'],
+                    **{
+                        f: int(data[c]) if f in csv_numbers else data[c]
+                        for f, c in columns.items()
+                    },
+                    'ttl': int(data['ttl']) if data.get('ttl') else None,
+                    'use_ttl': bool(data.get('ttl')),
+                }
+        finally:
+            ret.close()
+            self.post(
+                'fileop',
+                params={'_function': 'downloadcomplete'},
+                json={'token': token},
+            )
+
+    def csv_import(self, data, timeout=None):
+        """Import a CSV file and return the last task state and the failed rows"""
+        upload = self.fileop('uploadinit', {'filename': 'octoblox.csv'})
+        self.post(upload['url'], files={'file': ('octoblox.csv', data)})
+        task = self.fileop(
+            'csv_import',
+            {
+                'token': upload['token'],
+                'operation': 'CUSTOM',
+                'on_error': 'CONTINUE',
+                'action': 'START',
+            },
+        )['csv_import_task']
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while task['status'] not in csv_done:
+            if deadline is not None and time.monotonic() >= deadline:
+                self.log.error(
+                    'csv_import: %s still %s after %ss',
+                    task['_ref'],
+                    task['status'],
+                    timeout,
+                )
+                return task, []
+            time.sleep(self.csv_poll_interval)
+            # the task status is only current on the master
+            task = self.get(
+                self.url(task['_ref']),
+                params={'_return_fields+': 'status,import_id,lines_failed'},
+            ).json()
+        self.log.info('csv_import: %s %s', task['_ref'], task['status'])
+        if not task.get('lines_failed'):
+            return task, []
+        errors = self.fileop('csv_error_log', {'import_id': task['import_id']})
+        text = self.get(errors['url']).text
+        self.post(
+            'fileop',
+            params={'_function': 'downloadcomplete'},
+            json={'token': errors['token']},
+        )
+        return task, [
+            row
+            for row in csv.reader(io.StringIO(text))
+            if row and not row[0].lower().startswith('header-')
+        ]
+
+
+class AsyncInfoBlox:
+    """Encapsulates asynchronous traffic with the InfoBlox WAPI"""
+
+    def __init__(self, conn, limit=100):
+        self.conn = conn
+        self.limit = limit
+
+    async def __aenter__(self):
+        verify = self.conn.verify
+        self.session = aiohttp.ClientSession(
+            auth=aiohttp.BasicAuth(*self.conn.auth),
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                force_close=self.conn.headers.get('Connection') == 'close',
+                ssl=(
+                    ssl.create_default_context(cafile=verify)
+                    if isinstance(verify, str)
+                    else bool(verify)
+                ),
+            ),
+            **(
+                {
+                    'timeout': aiohttp.ClientTimeout(
+                        sock_connect=self.conn.timeout[0],
+                        sock_read=self.conn.timeout[1],
+                    )
+                }
+                if self.conn.timeout
+                else {}
+            ),
+        )
+        self.inventory_lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def request(self, method, url, params=None, json=None):
+        if self.conn.log_change and method not in ('GET', 'HEAD'):
+            self.conn.log.info(f'{method} {url} {json}')
+        body = None if json is None else encode_json(json)
+        throttle = self.conn.throttle
+        for attempt in itertools.count():
+            retry = attempt < throttle.max_retries
+            started = await throttle.acquire_async()
+            start = time.perf_counter()
+            congested = True
+            try:
+                async with self.session.request(
+                    method,
+                    self.conn.url(
+                        url, self.conn.read_base() if method == 'GET' else None
+                    ),
+                    params={k: str(v) for k, v in params.items()} if params else None,
+                    data=body,
+                    headers=(
+                        None if body is None else {'Content-Type': 'application/json'}
+                    ),
+                ) as ret:
+                    content = await ret.read()
+                congested = ret.status in throttle.transient
+            except aiohttp.ClientConnectionError:
+                # a write may have reached the grid before the connection broke
+                if not retry or method != 'GET':
+                    raise
+                delay = throttle.delay(attempt)
+            else:
+                self.conn.metrics.observe(
+                    method,
+                    url,
+                    time.perf_counter() - start,
+                    ret.status,
+                    len(body or b''),
+                    len(content),
+                    '_page_id' in (params or {}),
+                )
+                if retry and throttle.retryable(method, ret.status):
+                    delay = throttle.delay(attempt, ret.headers.get('Retry-After'))
+                else:
+                    if ret.status >= 400:  # pragma: no cover
+                        self.conn.log.error(
+                            'AsyncInfoBlox.request: %d %s %s %r %s',
+                            ret.status,
+                            method,
+                            url,
+                            json,
+                            content,
+                        )
+                        ret.raise_for_status()
+                    return decode_json(content)
+            finally:
+                throttle.release(started, congested)
+            self.conn.metrics.retry(method, url)
+            self.conn.log.warning(
+                'AsyncInfoBlox.request: retrying %s %s in %.2fs', method, url, delay
+            )
+            await asyncio.sleep(delay)
+
+    async def get_inventory(self, zone_type, return_fields):
+        async with self.inventory_lock:
+            inventory = self.conn.inventories.get((zone_type, return_fields))
+            if inventory is None:
+                params = self.conn.inventory_params(return_fields)
+                inventory = self.conn.index_zones(
+                    zone_type,
+                    return_fields,
+                    [row async for row in self.get_paged(zone_type, params)],
+                )
+        return inventory
+
+    async def get_zone(
+        self, zone, zone_type='zone_auth', return_fields='soa_default_ttl'
+    ):
+        if self.conn.zone_inventory:
+            inventory = await self.get_inventory(zone_type, return_fields)
+            return inventory.get(self.conn.zone_key(self.conn.get_zone_fqdn(zone)), [])
+        return await self.request(
+            'GET', zone_type, params=self.conn.zone_params(zone, return_fields)
+        )
+
+    async def add_zone(
+        self, zone, zone_type='zone_auth', return_fields='soa_default_ttl'
+    ):
+        return self.conn.add_to_inventory(
+            zone_type,
+            await self.request(
+                'POST', zone_type, json=self.conn.zone_payload(zone, return_fields)
+            ),
+        )
+
+    async def get_paged(self, object, params):
+        url = self.conn.url(object, self.conn.read_base())
+        ret = await self.request('GET', url, self.conn.paged_params(params))
+        for row in ret['result']:
+            yield row
+        while 'next_page_id' in ret:
+            ret = await self.request('GET', url, {'_page_id': ret['next_page_id']})
+            for row in ret['result']:
+                yield row
+
+    async def get_records(self, type, fields, zone, default_ttl, **extra):
+        groups = defaultdict(lambda: ([], []))
+        async for d in self.get_paged(
+            'record:{0}'.format(type.lower()),
+            self.conn.records_params(type, fields, zone, **extra),
+        ):
+            self.conn.group_row(groups, type, d)
+        return [*self.conn.grouped(type, groups, default_ttl)]
+
+    async def dispatch(self, op):
+        await self.request(op['method'], op['object'], json=op.get('data'))
+
+
+class SupportedTypes(Set):
+    """The record types supported by the grid, read when first used"""
+
+    def __init__(self, conn, allowed=None):
+        self.conn = conn
+        self.allowed = allowed
+        self.cached = (None, None)
+
+    @classmethod
+    def _from_iterable(cls, it):
+        # set operators such as octoDNS SUPPORTS & SUPPORTS return plain sets
+        return set(it)
+
+    def types(self):
+        types = self.conn.get_supported_types()
+        source, allowed = self.cached
+        if types is not source:
+            # recomputed only when the schema is rediscovered
+            allowed = types & self.allowed if self.allowed else types
+            self.cached = (types, allowed)
+        return allowed
+
+    def __contains__(self, type):
+        return type in self.types()
+
+    def __iter__(self):
+        return iter(self.types())
+
+    def __len__(self):
+        return len(self.types())
 
 
 class InfoBloxProvider(BaseProvider):
@@ -266,6 +1451,40 @@ class InfoBloxProvider(BaseProvider):
         log_change=False,
         create_zones=False,
         new_zone_fields=None,
+        batch_size=None,
+        populate_workers=None,
+        populate_engine='record',
+        max_results=1000,
+        schema_cache=None,
+        schema_cache_ttl=86400,
+        pool_size=10,
+        keep_alive=True,
+        connect_timeout=None,
+        read_timeout=None,
+        zone_inventory=False,
+        incremental_cache=None,
+        use_async=False,
+        async_limit=100,
+        log_metrics=False,
+        apply_workers=None,
+        zone_cache=None,
+        zone_cache_ttl=300,
+        zone_cache_size=None,
+        defer_restart=False,
+        csv_import_threshold=None,
+        csv_import_timeout=3600,
+        warm_up=False,
+        read_endpoints=None,
+        hedge_after=None,
+        max_retries=3,
+        retry_backoff=0.5,
+        rate_limit=None,
+        rate_burst=None,
+        max_concurrency=None,
+        latency_target=None,
+        record_types=None,
+        desired_types_only=False,
+        managed_types=None,
         *args,
         **kwargs,
     ):
@@ -281,79 +1500,406 @@ class InfoBloxProvider(BaseProvider):
             log_change,
             new_zone_fields,
             self.log,
+            batch_size,
+            max_results,
+            schema_cache,
+            schema_cache_ttl,
+            pool_size,
+            keep_alive,
+            connect_timeout,
+            read_timeout,
+            zone_inventory,
+            defer_restart,
+            read_endpoints,
+            hedge_after,
+            Throttle(
+                rate_limit,
+                rate_burst,
+                max_concurrency,
+                latency_target,
+                max_retries,
+                retry_backoff,
+            ),
         )
         self.create_zones = create_zones
-        self.log.debug(
-            f'__init__: https://{username}@{endpoint}/wapi/v{self.conn.apiver}/'
+        self.zones = {}
+        self.populate_workers = populate_workers
+        self.apply_workers = apply_workers
+        self.csv_import_threshold = csv_import_threshold
+        self.csv_import_timeout = csv_import_timeout
+        if populate_engine not in populate_engines:
+            raise ValueError(f'Unknown populate_engine: {populate_engine}')
+        self.populate_engine = populate_engine
+        self.csv_export = populate_engine == 'csv_export'
+        if use_async and aiohttp is None:  # pragma: no cover
+            raise ValueError('use_async requires aiohttp to be installed')
+        self.use_async = use_async
+        self.incremental = FileCache(incremental_cache) if incremental_cache else None
+        self.zone_cache = (
+            FileCache(zone_cache, zone_cache_ttl, zone_cache_size)
+            if zone_cache
+            else None
+        )
+        self.async_limit = async_limit
+        if log_metrics:
+            atexit.register(self.conn.metrics.report, self.log)
+        if defer_restart:
+            atexit.register(self._restart_at_exit)
+        for type in (*(record_types or ()), *(managed_types or ())):
+            if type not in type_map:
+                raise ValueError(f'Unknown record type: {type}')
+        self.supported = SupportedTypes(
+            self.conn, {*record_types} if record_types else None
         )
+        self.desired_types_only = desired_types_only
+        self.managed_types = {*(managed_types or ())}
+        self.planning = threading.local()
+        self.warming = None
+        if warm_up:
+            self.warming = threading.Thread(target=self._warm_up, daemon=True)
+            self.warming.start()
+        self.log.debug(f'__init__: https://{username}@{endpoint}/wapi/')
         super(InfoBloxProvider, self).__init__(id, *args, **kwargs)
 
     @property
-    @lru_cache(1)
     def SUPPORTS(self):
-        supported_objects = self.conn.get('?_schema').json()['supported_objects']
-        return {t for t in type_map if f'record:{t.lower()}' in supported_objects}
-
-    def _data_for(self, type, zone, default_ttl, target):
-        spec = type_map[type]
-        single_field = isinstance(spec, str)
-        fields = (spec,) if single_field else (*spec,)
-        data = self.conn.get_records(type, fields, zone, default_ttl)
-        return [
-            (
-                ttl,
-                name,
-                source,
+        return self.supported
+
+    def plan(self, desired, *args, **kwargs):
+        if not self.desired_types_only:
+            return super().plan(desired, *args, **kwargs)
+        # populate only reads the types the plan can touch
+        self.planning.types = {r._type for r in desired.records} | self.managed_types
+        try:
+            return super().plan(desired, *args, **kwargs)
+        finally:
+            self.planning.types = None
+
+    def _types(self, target):
+        """Return the sorted record types populate reads for a zone"""
+        planned = getattr(self.planning, 'types', None)
+        if target and planned is not None:
+            return sorted(t for t in self.SUPPORTS if t in planned)
+        return sorted(self.SUPPORTS)
+
+    def _warm_up(self):
+        try:
+            self.conn.get_supported_types()
+        except Exception as e:
+            self.log.warning('_warm_up: failed, retrying on first use: %s', e)
+
+    def metrics(self):
+        return self.conn.metrics.summary()
+
+    def restart_services(self):
+        self.conn.restart_services()
+
+    def _restart_at_exit(self):
+        # exceptions raised by atexit hooks are only printed, so say what is lost
+        try:
+            self.conn.restart_services()
+        except Exception as e:
+            self.log.error(
+                'restart_services: failed, zones still waiting for a restart: %s: %s',
+                ', '.join(sorted(self.conn.restart_zones)),
+                e,
+            )
+
+    def _data_for(self, type, zone, default_ttl, target, data=None):
+        if data is None:
+            data = self.conn.get_records(type, type_fields(type), zone, default_ttl)
+        if type == 'ALIAS':
+            field = type_map[type][1]
+            alias_types = self.conn.alias_types
+            return (
                 (
-                    values[0][spec[0]] + 'invalid.'
-                    if target and {v[spec[1]] for v in values} != self.conn.alias_types
-                    else values[0][spec[0]]
+                    ttl,
+                    name,
+                    source,
+                    (
+                        values[0] + 'invalid.'
+                        if target and {r[field] for r in source} != alias_types
+                        else values[0]
+                    ),
+                )
+                for ttl, name, source, values in data
+            )
+        if type in single_types:
+            return (
+                (ttl, name, source, values[0]) for ttl, name, source, values in data
+            )
+        return data
+
+    def _exists(self, zone, zone_data, target):
+        self.zones[zone.name] = zone_data
+        zone.exists = bool(zone_data)
+
+        if not zone_data:
+            if target and not self.create_zones:  # pragma: no cover
+                raise ValueError(f'Zone does not exist in InfoBlox: {zone.name}')
+
+        return zone.exists
+
+    def _add_records(self, zone, type, data, lenient):
+        for t, n, s, v in data:
+            record_name = zone.hostname_from_fqdn(n)
+            record = Record.new(
+                zone,
+                record_name,
+                {
+                    'ttl': t,
+                    'type': type,
+                    'values' if isinstance(v, list) else 'value': v,
+                },
+                source=self,
+                lenient=lenient,
+            )
+            record.refs = self._refs(record, s, v)
+            zone.add_record(record, lenient=lenient)
+
+    def _refs(self, record, rows, values):
+        # ttl is only kept when the row overrides the zone default
+        if record._type == 'ALIAS':
+            return [
+                Ref(
+                    r.get('_ref'),
+                    r['target_name'] + '.',
+                    r['ttl'] if r.get('use_ttl') else None,
+                    r['target_type'],
                 )
-                if type == 'ALIAS'
-                else values[0][spec]
-                if type in single_types
-                else [
-                    v[spec] if single_field else {k: v[vk] for vk, k in spec.items()}
-                    for v in values
-                ],
+                for r in rows
+            ]
+        if not isinstance(values, list):
+            keys = [record.value] * len(rows)
+        else:
+            # keys match the values of the record, process does not reorder them
+            keys = record._value_type.process(values)
+        return [
+            Ref(r.get('_ref'), k, r['ttl'] if r.get('use_ttl') else None)
+            for r, k in zip(rows, keys)
+        ]
+
+    def _run_async(self, func):
+        async def main():
+            async with AsyncInfoBlox(self.conn, self.async_limit) as client:
+                return await func(client)
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(main())
+        finally:
+            loop.close()
+
+    def populate_zones(self, zones, target=False, lenient=False):
+        """Populate many zones concurrently on a single event loop"""
+        return self._run_async(
+            lambda client: asyncio.gather(
+                *(self.populate_async(client, z, target, lenient) for z in zones)
+            )
+        )
+
+    def apply_plans(self, plans):
+        """Apply many plans concurrently on a single event loop"""
+        self._run_async(
+            lambda client: asyncio.gather(
+                *(self._apply_async(client, p) for p in plans)
+            )
+        )
+        self.restart_services()
+
+    def _snapshot_key(self, zone, target):
+        return f'{self.conn.fqdn}/{self.conn.dns_view or ""}/{zone}/{bool(target)}'
+
+    def _load_zone(self, zone, target, lenient):
+        """Populate zone from a fresh snapshot, None when there is none"""
+        if not self.zone_cache:
+            return None
+        entry = self.zone_cache.get(self._snapshot_key(zone.name, target))
+        if entry is None or entry['types'] != self._types(target):
+            return None
+        self.log.debug('_load_zone: %s from snapshot', zone.name)
+        if not self._exists(zone, entry['zone'], target):
+            return False
+        for type, data in entry['records'].items():
+            self._add_records(zone, type, data, lenient)
+        return True
+
+    def _store_zone(self, zone, target, zone_data, records):
+        if not self.zone_cache:
+            return
+        self.zone_cache.set(
+            self._snapshot_key(zone, target),
+            {
+                'zone': zone_data,
+                'types': self._types(target),
+                'records': {
+                    t: [[ttl, n, [*map(compact_row, s)], v] for ttl, n, s, v in data]
+                    for t, data in records.items()
+                },
+            },
+        )
+
+    def _invalidate_zone(self, zone):
+        if self.zone_cache:
+            for target in (False, True):
+                self.zone_cache.delete(self._snapshot_key(zone, target))
+
+    def _fill_zone(self, zone, target, lenient, zone_data, records):
+        """Add records by type to zone and keep a snapshot when enabled"""
+        if self.zone_cache:
+            records = {t: [*data] for t, data in records.items()}
+        for type, data in records.items():
+            self._add_records(zone, type, data, lenient)
+        self._store_zone(zone.name, target, zone_data, records)
+        return True
+
+    async def populate_async(self, client, zone, target=False, lenient=False):
+        cached = self._load_zone(zone, target, lenient)
+        if cached is not None:
+            return cached
+
+        zone_data = await client.get_zone(zone.name)
+
+        if not self._exists(zone, zone_data, target):
+            self._store_zone(zone.name, target, zone_data, {})
+            return False
+
+        default_ttl = zone_data[0]['soa_default_ttl']
+
+        types = self._types(target)
+        data = await asyncio.gather(
+            *(
+                client.get_records(t, type_fields(t), zone.name, default_ttl)
+                for t in types
+            )
+        )
+
+        return self._fill_zone(
+            zone,
+            target,
+            lenient,
+            zone_data,
+            {
+                t: self._data_for(t, zone.name, default_ttl, target, rows)
+                for t, rows in zip(types, data)
+            },
+        )
+
+    def _read_rows(self, type, zone, master=False, **extra):
+        object = f'record:{type.lower()}'
+        return [
+            *self.conn.get_paged(
+                # an absolute url skips the read endpoints
+                self.conn.url(object) if master else object,
+                self.conn.records_params(type, type_fields(type), zone, **extra),
             )
-            for ttl, name, values, source in data
         ]
 
+    def _incremental_rows(self, zone, types):
+        key = f'{self.conn.fqdn}/{self.conn.dns_view or ""}/{zone}'
+        snapshot = self.incremental.get(key)
+        if snapshot is None or sorted(snapshot['rows']) != types:
+            self.log.debug('_incremental_rows: full read of %s', zone)
+            sequence_id = self.conn.get_sequence_id(types)
+            rows = {t: self._read_rows(t, zone) for t in types}
+        else:
+            sequence_id, changes = self.conn.get_changes(snapshot['sequence_id'], types)
+            rows = snapshot['rows']
+            known = {r['_ref'] for rs in rows.values() for r in rs}
+            changed, stale = set(), set()
+            for c in changes:
+                type = c['object_type'].split(':')[-1].upper()
+                name = ref_name(c['object'])
+                if type not in rows or not f'.{name}.'.endswith(f'.{zone}'):
+                    continue
+                # a ref missing from the snapshot is new or renamed, the old
+                # name of a renamed record is unknown so the type is re-read
+                if c['object'] in known:
+                    changed.add((type, name))
+                else:
+                    stale.add(type)
+            self.log.debug(
+                '_incremental_rows: %d changed names, %d re-read types since %s',
+                len(changed),
+                len(stale),
+                snapshot['sequence_id'],
+            )
+            for type in sorted(stale):
+                rows[type] = self._read_rows(type, zone)
+            for type, name in sorted(changed):
+                if type not in stale:
+                    rows[type] = [r for r in rows[type] if r['name'] != name]
+                    rows[type] += self._read_rows(type, zone, name=name)
+        self.incremental.set(key, {'sequence_id': sequence_id, 'rows': rows})
+        return rows
+
     def populate(self, zone, target=False, lenient=False):
         self.log.debug(
             'populate: name=%s, target=%s, lenient=%s', zone.name, target, lenient
         )
 
-        zone_data = self.conn.get_zone(zone.name)
+        if self.use_async:
+            return self.populate_zones([zone], target, lenient)[0]
 
-        zone.exists = bool(zone_data)
+        cached = self._load_zone(zone, target, lenient)
+        if cached is not None:
+            return cached
 
-        if not zone_data:
-            if target and not self.create_zones:  # pragma: no cover
-                raise ValueError(f'Zone does not exist in InfoBlox: {zone.name}')
+        zone_data = self.conn.get_zone(zone.name)
+
+        if not self._exists(zone, zone_data, target):
+            self._store_zone(zone.name, target, zone_data, {})
             return False
 
         default_ttl = zone_data[0]['soa_default_ttl']
 
-        for type in sorted(self.SUPPORTS):
-            for t, n, s, v in self._data_for(type, zone.name, default_ttl, target):
-                record_name = zone.hostname_from_fqdn(n)
-                record = Record.new(
-                    zone,
-                    record_name,
-                    {
-                        'ttl': t,
-                        'type': type,
-                        'values' if isinstance(v, list) else 'value': v,
-                    },
-                    source=self,
-                    lenient=lenient,
+        types = self._types(target)
+        if self.incremental:
+            # snapshots keep every type so planning other types stays incremental
+            rows = self._incremental_rows(zone.name, sorted(self.SUPPORTS))
+            data = (
+                self._data_for(
+                    t,
+                    zone.name,
+                    default_ttl,
+                    target,
+                    self.conn.group_records(t, rows[t], default_ttl),
                 )
-                record.refs = s
-                zone.add_record(record, lenient=lenient)
+                for t in types
+            )
+        elif self.populate_engine == 'csv_export':
+            data = (
+                self._data_for(
+                    t,
+                    zone.name,
+                    default_ttl,
+                    target,
+                    self.conn.group_records(
+                        t, self._export_rows(t, zone.name), default_ttl
+                    ),
+                )
+                for t in types
+            )
+        elif self.populate_engine == 'allrecords':
+            rows = self.conn.get_all_records(
+                zone.name, {t: type_fields(t) for t in types}, default_ttl
+            )
+            data = (
+                self._data_for(t, zone.name, default_ttl, target, rows[t])
+                for t in types
+            )
+        elif self.populate_workers:
+            with ThreadPoolExecutor(self.populate_workers) as pool:
+                data = list(
+                    pool.map(
+                        lambda t: [*self._data_for(t, zone.name, default_ttl, target)],
+                        types,
+                    )
+                )
+        else:
+            data = (self._data_for(t, zone.name, default_ttl, target) for t in types)
 
-        return True
+        return self._fill_zone(zone, target, lenient, zone_data, dict(zip(types, data)))
 
     def _extra_changes(self, existing, changes, **kwargs):
         self.log.debug(
@@ -396,88 +1942,274 @@ class InfoBloxProvider(BaseProvider):
         ext = change.existing
         new = change.new
         type = new._type
-        update = ext.ttl != new.ttl
-        values = [new.value] if type in single_types else new.values
-        evalues = [ext.value] if type in single_types else ext.values
-        for value in values:
-            if type == 'ALIAS':
-                spec = type_map[type]
-                refs = {r[spec[1]]: r for r in ext.refs}
-                for t in self.conn.alias_types - {*refs}:
-                    v = {spec[0]: value[:-1], spec[1]: t}
-                    self.conn.add_record(type, zone, new.name, v, new.ttl, default_ttl)
-                for t in self.conn.alias_types & {*refs}:
-                    if refs[t][spec[0]] != value:  # pragma: no branch
-                        v = {spec[0]: value[:-1], spec[1]: t}
-                        self.conn.mod_record(type, refs[t], v, new.ttl, default_ttl)
-                self.conn.del_record(
-                    r for t, r in refs.items() if t not in self.conn.alias_types
-                )
-            elif type in single_types:
-                self.conn.mod_record(type, ext.refs[0], value, new.ttl, default_ttl)
-            elif value in evalues:
-                if update:  # pragma: no branch
-                    self.conn.mod_record(
-                        type,
-                        ext.refs[evalues.index(value)],
-                        value,
-                        new.ttl,
-                        default_ttl,
-                    )
-            else:  # pragma: no cover
-                self.conn.add_record(type, zone, new.name, value, new.ttl, default_ttl)
-        if type not in single_types:
+        # the ttl a ref carries when it already matches the new record
+        ttl = None if type == 'NS' or new.ttl == default_ttl else new.ttl
+        if type == 'ALIAS':
+            spec = type_map[type]
+            refs = {r.target_type: r for r in ext.refs}
+            for t in self.conn.alias_types - {*refs}:
+                v = {spec[0]: new.value[:-1], spec[1]: t}
+                self.conn.add_record(type, zone, new.name, v, new.ttl, default_ttl)
+            for t in self.conn.alias_types & {*refs}:
+                if refs[t].value != new.value or refs[t].ttl != ttl:
+                    v = {spec[0]: new.value[:-1], spec[1]: t}
+                    self.conn.mod_record(type, refs[t], v, new.ttl, default_ttl)
             self.conn.del_record(
-                ext.refs[i] for i, value in enumerate(evalues) if value not in values
+                r for t, r in refs.items() if t not in self.conn.alias_types
             )
+        elif type in single_types:
+            ref = ext.refs[0]
+            if ref.value != new.value or ref.ttl != ttl:  # pragma: no branch
+                self.conn.mod_record(type, ref, new.value, new.ttl, default_ttl)
+        else:
+            existing = {}
+            for r in ext.refs:
+                existing.setdefault(r.value, r)
+            kept = set()
+            for value in new.values:
+                ref = existing.get(value)
+                if ref is None:
+                    self.conn.add_record(
+                        type, zone, new.name, value, new.ttl, default_ttl
+                    )
+                    continue
+                kept.add(ref.ref)
+                if ref.ttl != ttl:
+                    self.conn.mod_record(type, ref, value, new.ttl, default_ttl)
+            self.conn.del_record(r for r in ext.refs if r.ref not in kept)
+
+    def _lookup_refs(self, zone, record, default_ttl):
+        """Read the refs of a record populated without them"""
+        fqdn = f'{record.name}.{zone}' if record.name else zone
+        rows = [
+            r
+            for r in self._read_rows(record._type, zone, master=True, name=fqdn)
+            if ref_name(r['_ref']) == fqdn
+        ]
+        return [
+            ref
+            for _, _, s, v in self._data_for(
+                record._type,
+                zone,
+                default_ttl,
+                False,
+                self.conn.group_records(record._type, rows, default_ttl),
+            )
+            for ref in self._refs(record, s, v)
+        ]
+
+    def _export_rows(self, type, zone):
+        if self.csv_export and type in csv_types:
+            try:
+                return self.conn.get_export(type, zone)
+            except requests.HTTPError:
+                self.log.warning('_export_rows: csv export failed, paging records')
+                self.csv_export = False
+        return self._read_rows(type, zone)
+
+    def _apply_change(self, zone, change, default_ttl):
+        ext = change.existing
+        if ext and any(r.ref is None for r in ext.refs):
+            ext.refs = self._lookup_refs(zone, ext, default_ttl)
+        class_name = change.__class__.__name__
+        getattr(self, f'_apply_{class_name}')(zone, change, default_ttl)
+
+    async def _apply_async(self, client, plan):
+        zone = plan.desired.name
+        self._invalidate_zone(zone)
+
+        zone_data = self.zones.get(zone) or await client.get_zone(zone)
+
+        if not zone_data:
+            if not self.create_zones:  # pragma: no cover
+                raise ValueError(f'Zone does not exist in InfoBlox: {zone}')
+            zone_data = self.zones[zone] = [await client.add_zone(zone)]
+
+        default_ttl = zone_data[0].get('soa_default_ttl', 3600)
+
+        async def apply_changes(changes):
+            for change in changes:
+                ops = self.conn.capture(
+                    self._apply_change, zone[:-1], change, default_ttl
+                )
+                for op in ops:
+                    await client.dispatch(op)
+
+        groups = group_changes(c for c in plan.changes if not isinstance(c, Create))
+        results = await asyncio.gather(
+            *map(apply_changes, groups), return_exceptions=True
+        )
+        check_failures(self.log, groups, results)
+
+    def _csv_actions(self, zone, change, default_ttl):
+        """Translate the operations of a change into CSV import actions"""
+        ops = self.conn.capture(self._apply_change, zone, change, default_ttl)
+        refs = {r.ref: r for r in change.existing.refs} if change.existing else {}
+        for op in ops:
+            object, data = op['object'], op.get('data')
+            if op['method'] == 'POST':
+                yield 'I', data['name'], data
+                continue
+            name = ref_name(object)
+            old = field_writers[change.record._type](refs[object].value)
+            if op['method'] == 'DELETE':
+                yield 'D', name, old
+            elif all(data[k] == v for k, v in old.items()):
+                yield 'O', name, data
+            else:
+                yield 'D', name, old
+                yield 'I', name, data
+
+    def _apply_csv(self, zone, changes, default_ttl):
+        data = io.StringIO()
+        writer = csv.writer(data)
+        rows = {}
+        header = None
+        for change in changes:
+            type = change.record._type
+            if type not in csv_types:
+                self._apply_change(zone, change, default_ttl)
+                continue
+            for action, name, fields in self._csv_actions(zone, change, default_ttl):
+                if header != type:
+                    header = type
+                    writer.writerow(self.conn.csv_header(type))
+                writer.writerow(self.conn.csv_row(type, action, name, fields))
+                rows[csv_types[type][0], name] = change
+        self.conn.flush()
+        if not rows:
+            return
+
+        task, failed = self.conn.csv_import(data.getvalue(), self.csv_import_timeout)
+        pending = [*dict.fromkeys(rows.values())]
+        if task['status'] not in csv_done:
+            # nothing tells which rows were imported, fail every CSV change
+            error = ValueError(
+                f'csv import still {task["status"]} after {self.csv_import_timeout}s'
+            )
+            check_failures(self.log, [[c] for c in pending], [error] * len(pending))
+        failures = {}
+        for row in failed:
+            object = row[0].lower()
+            change = next(
+                (rows[object, f] for f in row[1:] if (object, f) in rows), None
+            )
+            if change is not None:
+                failures.setdefault(change, ValueError(row[-1]))
+        if task['status'] != 'COMPLETED' and not failures:
+            # the task failed as a whole, no row tells which change caused it
+            error = ValueError(f'csv import {task["status"]}')
+            failures = dict.fromkeys(pending, error)
+        check_failures(self.log, [[c] for c in failures], [*failures.values()])
+
+    def _apply_parallel(self, zone, changes, default_ttl):
+        groups = group_changes(changes)
+        # capture every operation up front, the connection only sends them
+        operations = [
+            [
+                op
+                for change in group
+                for op in self.conn.capture(
+                    self._apply_change, zone, change, default_ttl
+                )
+            ]
+            for group in groups
+        ]
+
+        def run(ops):
+            for op in ops:
+                self.conn.dispatch(op)
+
+        with ThreadPoolExecutor(self.apply_workers) as pool:
+            futures = [pool.submit(run, ops) for ops in operations]
+        check_failures(self.log, groups, [f.exception() for f in futures])
 
     def _apply(self, plan):
 
+        if self.use_async:
+            # apply_plans would restart services after every zone
+            self._run_async(lambda client: self._apply_async(client, plan))
+            return
+
         zone = plan.desired.name
+        self._invalidate_zone(zone)
 
-        zone_data = self.conn.get_zone(zone)
+        zone_data = self.zones.get(zone) or self.conn.get_zone(zone)
 
         if not zone_data:
             if not self.create_zones:  # pragma: no cover
                 raise ValueError(f'Zone does not exist in InfoBlox: {zone}')
-            zone_data = [self.conn.add_zone(zone)]
+            zone_data = self.zones[zone] = [self.conn.add_zone(zone)]
 
         default_ttl = zone_data[0].get('soa_default_ttl', 3600)
 
+        changes = [c for c in plan.changes if not isinstance(c, Create)]
+        if self.csv_import_threshold and len(changes) >= self.csv_import_threshold:
+            return self._apply_csv(zone[:-1], changes, default_ttl)
+
+        if self.apply_workers:
+            return self._apply_parallel(zone[:-1], changes, default_ttl)
+
         for change in plan.changes:
             if isinstance(change, Create):
                 continue
-            class_name = change.__class__.__name__
-            getattr(self, f'_apply_{class_name}')(zone[:-1], change, default_ttl)
+            self._apply_change(zone[:-1], change, default_ttl)
+
+        self.conn.flush()
 
 
 class DelegatedProvider(InfoBloxProvider):
+    async def populate_async(self, client, zone, target=False, lenient=False):
+        zone_data = await client.get_zone(zone.name, 'zone_delegated', 'delegated_ttl')
+
+        return self._exists(zone, zone_data, target)
+
     def populate(self, zone, target=False, lenient=False):
         self.log.debug(
             'populate: name=%s, target=%s, lenient=%s', zone.name, target, lenient
         )
 
+        if self.use_async:
+            return self.populate_zones([zone], target, lenient)[0]
+
         zone_data = self.conn.get_zone(zone.name, 'zone_delegated', 'delegated_ttl')
 
-        zone.exists = bool(zone_data)
+        return self._exists(zone, zone_data, target)
 
-        if not zone_data:
-            if target and not self.create_zones:  # pragma: no cover
-                raise ValueError(f'Zone does not exist in InfoBlox: {zone.name}')
-            return False
+    async def _apply_async(self, client, plan):
 
-        return True
+        zone = plan.desired.name
+
+        zone_data = self.zones.get(zone) or await client.get_zone(
+            zone, 'zone_delegated', 'delegated_ttl'
+        )
+
+        if not zone_data:
+            if not self.create_zones:  # pragma: no cover
+                raise ValueError(f'Zone does not exist in InfoBlox: {zone}')
+            self.zones[zone] = [
+                await client.add_zone(zone, 'zone_delegated', 'delegated_ttl')
+            ]
 
     def _apply(self, plan):
 
+        if self.use_async:
+            # apply_plans would restart services after every zone
+            self._run_async(lambda client: self._apply_async(client, plan))
+            return
+
         zone = plan.desired.name
 
-        zone_data = self.conn.get_zone(zone, 'zone_delegated', 'delegated_ttl')
+        zone_data = self.zones.get(zone) or self.conn.get_zone(
+            zone, 'zone_delegated', 'delegated_ttl'
+        )
 
         if not zone_data:
             if not self.create_zones:  # pragma: no cover
                 raise ValueError(f'Zone does not exist in InfoBlox: {zone}')
-            self.conn.add_zone(zone, 'zone_delegated', 'delegated_ttl')
+            self.zones[zone] = [
+                self.conn.add_zone(zone, 'zone_delegated', 'delegated_ttl')
+            ]
 
 
 class EmptySource(BaseSource):
@@ -1,9 +1,10 @@
 import re
+import json
 import uuid
 import logging
 
 import pytest
-from urllib.parse import urlparse, quote_plus
+from urllib.parse import urlparse, quote_plus, unquote_plus
 from octoblox import InfoBloxProvider, DelegatedProvider
 
 logging.basicConfig(level='DEBUG')
@@ -97,8 +98,8 @@ def zones(zone_name, new_zone_name, empty_zone_name, new_ipv4_cidr, new_ipv6_cid
     }
 
 
-def get_records(zone):
-    c = {
+def record_data(zone):
+    return {
         'A': [
             {
                 '_ref': f'record:a/{uuid.uuid4()}:xyz.{zone}/default',
@@ -146,6 +147,10 @@ def get_records(zone):
         ],
     }
 
+
+def get_records(zone):
+    c = record_data(zone)
+
     def get_record(request, context, check=c):
         return {
             'result': check.get(urlparse(request.url).path.split(':')[-1].upper(), [])
@@ -159,7 +164,25 @@ def records(zone_name):
     return (re.compile('/wapi/v1.0/record:\\w+([?/]|$)'), get_records(zone_name[:-1]))
 
 
-def make_provider(cls, requests_mock, zones, records, schema):
+@pytest.fixture
+def all_records(zone_name):
+    rows = [
+        {
+            '_ref': f'allrecords/{uuid.uuid4()}:{r["name"]}/default',
+            'type': f'record:{type.lower()}',
+            'name': r['name'],
+            'creator': 'STATIC',
+            'record': r,
+        }
+        for type, rs in record_data(zone_name[:-1]).items()
+        for r in rs
+    ]
+    rows.append({**rows[0], 'creator': 'DYNAMIC'})
+    rows.append({**rows[0], 'type': 'record:dnskey'})
+    return '/wapi/v1.0/allrecords', rows
+
+
+def make_provider(cls, requests_mock, zones, records, schema, **kwargs):
     requests_mock.get(schema[0], json=schema[1])
     for url, data in zones.items():
         requests_mock.get(url, json=data)
@@ -185,6 +208,7 @@ def make_provider(cls, requests_mock, zones, records, schema):
         'password',
         log_change=True,
         create_zones=True,
+        **kwargs,
     )
 
 
@@ -193,6 +217,64 @@ def provider(requests_mock, zones, records, schema):
     return make_provider(InfoBloxProvider, requests_mock, zones, records, schema)
 
 
+@pytest.fixture
+def provider_factory(requests_mock, zones, records, schema):
+    return lambda **kwargs: make_provider(
+        InfoBloxProvider, requests_mock, zones, records, schema, **kwargs
+    )
+
+
+@pytest.fixture
+def delegated_factory(requests_mock, zones, records, schema):
+    return lambda **kwargs: make_provider(
+        DelegatedProvider, requests_mock, zones, records, schema, **kwargs
+    )
+
+
+@pytest.fixture
+def aio_grid(zones, zone_name):
+    aioresponses = pytest.importorskip('aioresponses')
+    data = record_data(zone_name[:-1])
+    lookup = {
+        (urlparse(url).path.split('/')[-1], unquote_plus(url.split('?fqdn=')[-1])): d
+        for url, d in zones.items()
+    }
+
+    def get(url, **kwargs):
+        object = url.path.split('/')[-1]
+        if object.startswith('record:'):
+            rows = data.get(object.split(':')[-1].upper(), [])
+            start = int(kwargs['params'].get('_page_id', 0))
+            payload = {'result': rows[start : start + 2]}
+            if start + 2 < len(rows):
+                payload['next_page_id'] = str(start + 2)
+        elif 'fqdn' in kwargs['params']:
+            payload = lookup[object, kwargs['params']['fqdn']]
+        else:
+            payload = {
+                'result': [r for (t, _), d in lookup.items() if t == object for r in d]
+            }
+        return aioresponses.CallbackResult(payload=payload)
+
+    def post(url, **kwargs):
+        object = url.path.split('/')[-1]
+        payload = {**json.loads(kwargs['data']), '_ref': f'{object}/{uuid.uuid4()}'}
+        if object.startswith('zone_'):
+            payload['soa_default_ttl'] = 7200
+        return aioresponses.CallbackResult(status=201, payload=payload)
+
+    def ref(url, **kwargs):
+        return aioresponses.CallbackResult(payload=url.path.split('/v1.0/')[-1])
+
+    pattern = re.compile('https://non.existent/wapi/v1.0/.*')
+    with aioresponses.aioresponses() as mock:
+        mock.get(pattern, callback=get, repeat=True)
+        mock.post(pattern, callback=post, repeat=True)
+        mock.put(pattern, callback=ref, repeat=True)
+        mock.delete(pattern, callback=ref, repeat=True)
+        yield mock
+
+
 @pytest.fixture
 def delegated_provider(requests_mock, zones, records, schema):
     return make_provider(DelegatedProvider, requests_mock, zones, records, schema)
@@ -77,3 +77,16 @@ def test_ipv6_zone(delegated_provider, new_ipv6_zone, result, source):
     assert len(zone.records) == 0
     plan = delegated_provider.plan(expected)
     delegated_provider.apply(plan)
+
+
+def test_async_delegated(delegated_factory, aio_grid, zone_name, new_zone_name):
+    provider = delegated_factory(use_async=True)
+    zones = [Zone(zone_name, []), Zone(new_zone_name, [])]
+    assert provider.populate_zones(zones) == [True, False]
+    expected = Zone(new_zone_name, [])
+    YamlProvider('Y', Path(__file__).parent / 'config').populate(expected)
+    assert not provider.populate(Zone(new_zone_name, []))
+    provider.apply(provider.plan(expected))
+    assert ('POST', 'zone_delegated') in {
+        (m, u.path.split('/')[-1]) for m, u in aio_grid.requests
+    }
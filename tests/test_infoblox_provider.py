@@ -1,6 +1,25 @@
 import os
+import asyncio
+import json
+import re
+import pytest
+import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from conftest import record_data
 from octodns.provider.yaml import YamlProvider
+from octodns.record import Create, Delete, Record
 from octodns.zone import Zone
+from octoblox import (
+    ApplyError,
+    FileCache,
+    Throttle,
+    csv_types,
+    field_writers,
+    group_changes,
+    writers,
+)
 
 
 def test_zone_data(provider, zone_name):
@@ -56,3 +75,1033 @@ def test_ipv6_zone(provider, new_ipv6_zone):
     provider.populate(zone)
     plan = provider.plan(expected)
     provider.apply(plan)
+
+
+def test_batched_apply(provider_factory, requests_mock, zone_name):
+    provider = provider_factory(batch_size=2)
+    batch = requests_mock.post('/wapi/v1.0/request', json=[])
+    expected = Zone(zone_name, [])
+    source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+    source.populate(expected)
+    plan = provider.plan(expected)
+    provider.apply(plan)
+    assert batch.call_count > 1
+    assert all(len(r.json()) <= 2 for r in batch.request_history)
+    assert not provider.conn.batch
+
+
+def test_batched_apply_replay(provider_factory, requests_mock, zone_name):
+    provider = provider_factory(batch_size=100)
+    batch = requests_mock.post('/wapi/v1.0/request', status_code=400)
+    expected = Zone(zone_name, [])
+    source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+    source.populate(expected)
+    plan = provider.plan(expected)
+    provider.apply(plan)
+    assert batch.call_count == 1
+    ops = batch.last_request.json()
+    assert {op['method'] for op in ops} == {'POST', 'PUT', 'DELETE'}
+    replayed = [
+        r
+        for r in requests_mock.request_history
+        if r.method != 'GET' and not r.path.endswith('/request')
+    ]
+    assert len(replayed) == len(ops)
+
+
+def test_concurrent_populate(provider_factory, zone_name):
+    zone = Zone(zone_name, [])
+    provider_factory().populate(zone, lenient=True)
+    concurrent = Zone(zone_name, [])
+    provider_factory(populate_workers=4).populate(concurrent, lenient=True)
+    assert [(r.name, r._type, r.data) for r in sorted(concurrent.records)] == [
+        (r.name, r._type, r.data) for r in sorted(zone.records)
+    ]
+
+
+def test_allrecords_populate(provider_factory, requests_mock, all_records, zone_name):
+    zone = Zone(zone_name, [])
+    provider_factory().populate(zone, lenient=True)
+    url, rows = all_records
+    requests_mock.get(url, json={'result': rows[:3], 'next_page_id': 'p2'})
+    requests_mock.get(f'{url}?_page_id=p2', json={'result': rows[3:]})
+    single = Zone(zone_name, [])
+    provider = provider_factory(populate_engine='allrecords')
+    provider.populate(single, lenient=True)
+    assert [(r.name, r._type, r.data) for r in sorted(single.records)] == [
+        (r.name, r._type, r.data) for r in sorted(zone.records)
+    ]
+    assert requests_mock.last_request.qs['_page_id'] == ['p2']
+
+
+def test_unknown_populate_engine(provider_factory):
+    with pytest.raises(ValueError):
+        provider_factory(populate_engine='unknown')
+
+
+def test_compact_refs(provider, zone_name):
+    zone = Zone(zone_name, [])
+    provider.populate(zone, lenient=True)
+    for record in zone.records:
+        assert not hasattr(record.refs[0], '__dict__')
+        assert repr(record.refs[0]) == f'Ref({record.refs[0].ref!r})'
+        if record._type == 'ALIAS':
+            assert {r.value for r in record.refs} == {record.value}
+            assert all(r.target_type for r in record.refs)
+        else:
+            values = record.values if hasattr(record, 'values') else [record.value]
+            assert {r.value for r in record.refs} == {*values}
+
+
+def test_minimal_update(provider, zone_name):
+    existing = Zone(zone_name, [])
+    provider.populate(existing, lenient=True)
+    default_ttl = provider.zones[zone_name][0]['soa_default_ttl']
+    desired = Zone(zone_name, [])
+    for record in existing.records:
+        data = {**record.data, 'type': record._type}
+        if record.name == 'xyz' and record._type == 'A':
+            data = {
+                'type': 'A',
+                'ttl': data['ttl'],
+                'values': ['192.0.2.9', '192.168.0.1'],
+            }
+        elif record.name == 'www' and record._type == 'A':
+            data['ttl'] = default_ttl + 1
+        desired.add_record(Record.new(desired, record.name, data, lenient=True))
+    changes = {c.record.name: c for c in provider.plan(desired).changes}
+
+    def ops(name):
+        return provider.conn.capture(
+            provider._apply_change, zone_name[:-1], changes[name], default_ttl
+        )
+
+    assert [(op['method'], op['data']['ipv4addr']) for op in ops('xyz')] == [
+        ('POST', '192.0.2.9')
+    ]
+    assert [(op['method'], op['data']['ttl']) for op in ops('www')] == [
+        ('PUT', default_ttl + 1)
+    ]
+    for ref in changes['www'].existing.refs:
+        ref.ttl = default_ttl + 1
+    assert not ops('www')
+
+
+def test_parallel_apply(provider_factory, requests_mock, zone_name):
+    def writes():
+        return sorted(
+            (r.method, r.path, r.text)
+            for r in requests_mock.request_history
+            if r.method != 'GET'
+        )
+
+    expected = Zone(zone_name, [])
+    source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+    source.populate(expected)
+    sequential = provider_factory()
+    parallel = provider_factory(apply_workers=4)
+    sequential.apply(sequential.plan(expected))
+    applied = writes()
+    requests_mock.reset_mock()
+    parallel.apply(parallel.plan(expected))
+    assert writes() == applied
+
+    requests_mock.reset_mock()
+    requests_mock.delete(re.compile('record:'), status_code=400)
+    with pytest.raises(ApplyError) as e:
+        parallel.apply(parallel.plan(expected))
+    assert e.value.failures and 'changes to' in str(e.value)
+    assert {m for m, _, _ in writes()} == {'POST', 'PUT', 'DELETE'}
+
+
+def test_group_changes(zone_name):
+    zone = Zone(zone_name, [])
+    cname = Record.new(zone, 'www', {'type': 'CNAME', 'ttl': 60, 'value': 'a.b.'})
+    a = Record.new(zone, 'www', {'type': 'A', 'ttl': 60, 'value': '192.0.2.1'})
+    other = Record.new(zone, 'ftp', {'type': 'A', 'ttl': 60, 'value': '192.0.2.1'})
+    changes = [Create(cname), Create(other), Delete(a)]
+    assert group_changes(changes) == [[changes[2], changes[0]], [changes[1]]]
+
+
+def test_max_results(provider_factory, requests_mock, zone_name):
+    provider = provider_factory(max_results=250)
+    provider.populate(Zone(zone_name, []), lenient=True)
+    pages = [r for r in requests_mock.request_history if '_paging' in r.qs]
+    assert pages and all(r.qs['_max_results'] == ['250'] for r in pages)
+
+
+def test_schema_cache(provider_factory, requests_mock, tmp_path):
+    def fetched():
+        return sum('_schema' in r.url for r in requests_mock.request_history)
+
+    provider = provider_factory(schema_cache=tmp_path)
+    assert provider.SUPPORTS and provider.SUPPORTS
+    assert fetched() == 1
+    provider = provider_factory(schema_cache=tmp_path)
+    assert 'A' in provider.SUPPORTS
+    assert fetched() == 1
+    provider.conn.invalidate_schema()
+    provider.conn.invalidate_schema()
+    assert not [*tmp_path.iterdir()]
+    assert 'A' in provider.SUPPORTS
+    assert fetched() == 2
+    assert 'A' in provider_factory(schema_cache=tmp_path, schema_cache_ttl=0).SUPPORTS
+    assert fetched() == 3
+    for file in tmp_path.iterdir():
+        file.write_text('{')
+    assert 'A' in provider_factory(schema_cache=tmp_path).SUPPORTS
+    assert fetched() == 4
+
+
+def test_metrics(provider_factory, requests_mock, zone_name, monkeypatch, caplog):
+    hooks = []
+    monkeypatch.setattr('atexit.register', lambda *args: hooks.append(args))
+    provider = provider_factory(max_results=2, log_metrics=True)
+    provider.populate(Zone(zone_name, []), lenient=True)
+    metrics = provider.metrics()
+    assert metrics['GET schema']['requests'] == 1
+    records = metrics['GET record:a']
+    assert records['requests'] == sum(
+        r.method == 'GET' and r.path.endswith('/record:a')
+        for r in requests_mock.request_history
+    )
+    assert records['received'] and not records['errors'] and not records['pages']
+    assert sum(records['histogram']) == records['requests']
+    provider.conn.metrics.retry('GET', 'record:a?name=www')
+    assert provider.metrics()['GET record:a']['retries'] == 1
+    func, log = hooks[0]
+    with caplog.at_level('INFO'):
+        func(log)
+    assert 'GET record:a requests=' in caplog.text
+
+
+def test_shared_connection_pool(provider_factory, requests_mock, zone_name):
+    provider = provider_factory(connect_timeout=3, read_timeout=30)
+    other = provider_factory(keep_alive=False)
+    url = 'https://non.existent/'
+    assert provider.conn.adapters[url] is other.conn.adapters[url]
+    assert other.conn.headers['Connection'] == 'close'
+    provider.populate(Zone(zone_name, []), lenient=True)
+    assert requests_mock.last_request.timeout == (3, 30)
+
+
+def async_calls(aio_grid, method):
+    return [
+        u for (m, u), calls in aio_grid.requests.items() if m == method for _ in calls
+    ]
+
+
+def test_async_populate(provider_factory, aio_grid, zone_name, new_zone_name):
+    zone = Zone(zone_name, [])
+    provider_factory().populate(zone, lenient=True)
+    provider = provider_factory(use_async=True, async_limit=10)
+    concurrent = Zone(zone_name, [])
+    assert provider.populate(concurrent, lenient=True)
+    assert [(r.name, r._type, r.data) for r in sorted(concurrent.records)] == [
+        (r.name, r._type, r.data) for r in sorted(zone.records)
+    ]
+    zones = [Zone(zone_name, []), Zone(new_zone_name, [])]
+    assert provider.populate_zones(zones, lenient=True) == [True, False]
+    assert len(zones[0].records) == len(zone.records)
+    assert provider.metrics()['GET record:alias']['pages']
+
+
+def test_async_apply(provider_factory, aio_grid, zone_name, new_zone_name):
+    provider = provider_factory(use_async=True)
+    plans = []
+    for name in (zone_name, new_zone_name):
+        expected = Zone(name, [])
+        source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+        source.populate(expected)
+        plans.append(provider.plan(expected))
+    provider.apply(plans[0])
+    assert async_calls(aio_grid, 'PUT') and async_calls(aio_grid, 'DELETE')
+    provider.apply_plans(plans[1:])
+    assert any('zone_auth' in str(u) for u in async_calls(aio_grid, 'POST'))
+
+
+def test_zone_metadata_reused(provider, requests_mock, zone_name, new_zone_name):
+    for name in (zone_name, new_zone_name):
+        expected = Zone(name, [])
+        source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+        source.populate(expected)
+        provider.apply(provider.plan(expected))
+    lookups = [r for r in requests_mock.request_history if 'fqdn' in r.qs]
+    assert [r.method for r in lookups] == ['GET', 'GET', 'GET']
+    assert provider.zones[new_zone_name][0]['soa_default_ttl'] == 7200
+
+
+def test_zone_inventory(provider_factory, requests_mock, zones, zone_name):
+    inventory = [
+        {**d[0], 'fqdn': d[0]['fqdn'].upper()}
+        for url, d in zones.items()
+        if d and 'zone_auth' in url
+    ]
+    inventory.append(
+        {'_ref': 'v6', 'fqdn': '123:4567:89ab:cdef::/64', 'soa_default_ttl': 3600}
+    )
+    requests_mock.get(
+        '/wapi/v1.0/zone_auth?_paging=1',
+        json={'result': inventory[:1], 'next_page_id': 'zones'},
+    )
+    requests_mock.get(
+        '/wapi/v1.0/zone_auth?_page_id=zones', json={'result': inventory[1:]}
+    )
+    provider = provider_factory(zone_inventory=True)
+    names = (
+        zone_name,
+        'create.tests.',
+        '12.11.10.in-addr.arpa.',
+        'f.e.d.c.b.a.9.8.7.6.5.4.3.2.1.0.ip6.arpa.',
+    )
+    exists = []
+    for name in names:
+        expected = Zone(name, [])
+        source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+        source.populate(expected)
+        plan = provider.plan(expected)
+        exists.append(plan.existing.exists if plan else True)
+        provider.apply(plan) if plan else None
+    assert exists == [True, False, False, True]
+    lookups = [r for r in requests_mock.request_history if r.path.endswith('zone_auth')]
+    assert [r.method for r in lookups] == ['GET', 'GET', 'POST', 'POST']
+    indexed = provider.conn.inventories['zone_auth', 'soa_default_ttl']
+    assert len(indexed) == len(inventory) + 1
+
+
+def test_async_zone_inventory(provider_factory, aio_grid, zone_name, new_zone_name):
+    provider = provider_factory(use_async=True, zone_inventory=True)
+    zones = [Zone(zone_name, []), Zone(new_zone_name, [])]
+    assert provider.populate_zones(zones, lenient=True) == [True, False]
+    expected = Zone(new_zone_name, [])
+    source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+    source.populate(expected)
+    provider.apply(provider.plan(expected))
+    lookups = [u for m, u in aio_grid.requests if m == 'GET' and 'zone_auth' in str(u)]
+    assert len(lookups) == 1
+
+
+def a_record(name, ipv4addr):
+    return {
+        '_ref': f'record:a/{name}:{name}.unit.tests/default',
+        'name': f'{name}.unit.tests',
+        'ipv4addr': ipv4addr,
+        'use_ttl': False,
+    }
+
+
+def test_incremental_populate(provider_factory, requests_mock, zone_name, tmp_path):
+    providers = [provider_factory(incremental_cache=tmp_path) for _ in range(3)]
+    requests_mock.get(
+        '/wapi/v1.0/record:a',
+        json={'result': [a_record('www', '192.168.0.2'), a_record('old', '10.0.0.1')]},
+    )
+    cname = {
+        '_ref': 'record:cname/c:cname.unit.tests/default',
+        'name': 'cname.unit.tests',
+        'canonical': 'example.unit.tests',
+        'use_ttl': False,
+    }
+    requests_mock.get('/wapi/v1.0/record:cname', json={'result': [cname]})
+    requests_mock.get(
+        '/wapi/v1.0/db_objects?start_sequence_id=0',
+        json={'result': [{'last_sequence_id': '10'}]},
+    )
+
+    def walks():
+        return [
+            r
+            for r in requests_mock.request_history
+            if r.qs.get('start_sequence_id') == ['0']
+        ]
+
+    zone = Zone(zone_name, [])
+    providers[0].populate(zone, lenient=True)
+    assert {r.name for r in zone.records} >= {'cname', 'www'}
+    assert len(walks()) == 1
+
+    changes = [
+        ('record:a/www:www.unit.tests/default', 'record:a', '11'),
+        ('record:txt/t:txt.other.tests/default', 'record:txt', '12'),
+        ('record:cname/c:cname.unit.tests/default', 'record:cname', '13'),
+    ]
+    requests_mock.get(
+        '/wapi/v1.0/db_objects?start_sequence_id=10',
+        json={
+            'result': [
+                {'object': o, 'object_type': t, 'last_sequence_id': i}
+                for o, t, i in changes
+            ]
+        },
+    )
+    requests_mock.get('/wapi/v1.0/db_objects?start_sequence_id=13', json={'result': []})
+    requests_mock.get(
+        '/wapi/v1.0/record:a?name=www.unit.tests',
+        json={'result': [a_record('www', '10.0.0.2')]},
+    )
+    requests_mock.get(
+        '/wapi/v1.0/record:cname?name=cname.unit.tests', json={'result': []}
+    )
+    for provider in providers[1:]:
+        requests_mock.reset_mock()
+        zone = Zone(zone_name, [])
+        provider.populate(zone, lenient=True)
+        values = {r.name: r.values for r in zone.records if r._type == 'A'}
+        assert values == {'www': ['10.0.0.2'], 'old': ['10.0.0.1']}
+        assert 'cname' not in {r.name for r in zone.records}
+        reads = [r for r in requests_mock.request_history if '/record:' in r.path]
+        assert all('name' in r.qs for r in reads)
+    assert not reads
+
+    # a zone without a snapshot starts at the newest id seen this run
+    requests_mock.reset_mock()
+    providers[2].incremental = FileCache(tmp_path / 'cold')
+    providers[2].populate(Zone(zone_name, []), lenient=True)
+    assert not walks()
+    cold = [*(tmp_path / 'cold').iterdir()]
+    assert json.loads(cold[0].read_text())['data']['sequence_id'] == '13'
+
+    # without changes the history is walked once per run
+    providers[0].incremental = FileCache(tmp_path / 'other')
+    providers[0].populate(Zone(zone_name, []), lenient=True)
+    assert not walks()
+
+
+def test_incremental_rename(provider_factory, requests_mock, zone_name, tmp_path):
+    providers = [provider_factory(incremental_cache=tmp_path) for _ in range(2)]
+    requests_mock.get(
+        '/wapi/v1.0/record:a', json={'result': [a_record('old', '10.0.0.1')]}
+    )
+    requests_mock.get(
+        '/wapi/v1.0/db_objects?start_sequence_id=0',
+        json={'result': [{'last_sequence_id': '10'}]},
+    )
+    providers[0].populate(Zone(zone_name, []), lenient=True)
+
+    requests_mock.get(
+        '/wapi/v1.0/db_objects?start_sequence_id=10',
+        json={
+            'result': [
+                {
+                    'object': 'record:a/new:new.unit.tests/default',
+                    'object_type': 'record:a',
+                    'last_sequence_id': '11',
+                }
+            ]
+        },
+    )
+    requests_mock.get(
+        '/wapi/v1.0/record:a', json={'result': [a_record('new', '10.0.0.1')]}
+    )
+    requests_mock.reset_mock()
+    zone = Zone(zone_name, [])
+    providers[1].populate(zone, lenient=True)
+    assert {r.name for r in zone.records if r._type == 'A'} == {'new'}
+    reads = [r for r in requests_mock.request_history if '/record:' in r.path]
+    assert [r.path for r in reads] == ['/wapi/v1.0/record:a']
+
+
+def test_zone_cache(
+    provider_factory, requests_mock, zone_name, new_zone_name, tmp_path
+):
+    def snapshot(provider, name, target=False):
+        zone = Zone(name, [])
+        requests_mock.reset_mock()
+        exists = provider.populate(zone, target=target, lenient=True)
+        return exists, sorted((r.name, r._type, r.data) for r in zone.records), zone
+
+    def wapi_reads():
+        return [r for r in requests_mock.request_history if '_schema' not in r.url]
+
+    cache = tmp_path / 'zones'
+    provider = provider_factory(zone_cache=cache)
+    exists, records, _ = snapshot(provider, zone_name)
+    assert exists and records and wapi_reads()
+    assert snapshot(provider, new_zone_name)[0] is False
+
+    cached = provider_factory(zone_cache=cache, schema_cache=tmp_path / 'schema')
+    assert snapshot(cached, zone_name)[:2] == (True, records)
+    assert not wapi_reads()
+    assert snapshot(cached, new_zone_name)[0] is False
+    assert not wapi_reads()
+    _, _, zone = snapshot(cached, zone_name)
+    assert {r.ref for record in zone.records for r in record.refs}
+
+    expected = Zone(zone_name, [])
+    source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+    source.populate(expected)
+    cached.apply(cached.plan(expected))
+    snapshot(cached, zone_name)
+    assert wapi_reads()
+
+    snapshot(provider_factory(zone_cache=cache, zone_cache_ttl=0), zone_name)
+    assert wapi_reads()
+    for file in cache.iterdir():
+        file.write_text('{"key": "other", "time": 0, "data": null}')
+    snapshot(provider, zone_name)
+    assert wapi_reads()
+
+    small = provider_factory(zone_cache=cache, zone_cache_size=1)
+    snapshot(small, new_zone_name)
+    assert not [*cache.iterdir()]
+    snapshot(provider_factory(zone_cache=cache, zone_cache_size=10**6), zone_name)
+    assert [*cache.iterdir()]
+
+
+def test_file_cache_size(tmp_path, monkeypatch):
+    (tmp_path / 'stale.json').write_text('x' * 50)
+    cache = FileCache(tmp_path, max_size=150)
+    scans = []
+    glob = type(tmp_path).glob
+    monkeypatch.setattr(
+        type(tmp_path), 'glob', lambda *args: scans.append(args) or glob(*args)
+    )
+    for key in ('one', 'two', 'three', 'two'):
+        cache.set(key, 'x' * 10)
+    assert len(scans) == 1
+    assert [cache.get(k) for k in ('one', 'two', 'three')] == [None, 'x' * 10, 'x' * 10]
+    assert not (tmp_path / 'stale.json').exists()
+    assert cache.size == sum(f.stat().st_size for f in tmp_path.iterdir())
+    cache.delete('two')
+    assert cache.size == sum(f.stat().st_size for f in tmp_path.iterdir())
+
+
+def test_async_zone_cache(provider_factory, aio_grid, zone_name, tmp_path):
+    provider = provider_factory(use_async=True, zone_cache=tmp_path)
+    first, second = Zone(zone_name, []), Zone(zone_name, [])
+    assert provider.populate(first, lenient=True)
+    reads = len(async_calls(aio_grid, 'GET'))
+    assert provider.populate(second, lenient=True)
+    assert len(async_calls(aio_grid, 'GET')) == reads
+    assert len(second.records) == len(first.records)
+
+
+def test_deferred_restart(
+    provider_factory, requests_mock, new_zone_name, monkeypatch, caplog
+):
+    hooks = []
+    monkeypatch.setattr('atexit.register', lambda *args: hooks.append(args))
+    fields = {'restart_if_needed': True, 'grid_primary': [{'name': 'ns1'}]}
+    provider = provider_factory(new_zone_fields=fields, defer_restart=True)
+    requests_mock.get(
+        '/wapi/v1.0/grid', json=[{'_ref': 'grid/b25lLmNsdXN0ZXI:Infoblox'}]
+    )
+    url = '/wapi/v1.0/grid/b25lLmNsdXN0ZXI:Infoblox?_function=restartservices'
+    restart = requests_mock.post(url)
+    provider.restart_services()
+    assert not restart.called
+    for name in (new_zone_name, '12.11.10.in-addr.arpa.'):
+        provider.apply(provider.plan(Zone(name, [])))
+    created = [
+        r.json()
+        for r in requests_mock.request_history
+        if r.method == 'POST' and r.path.endswith('zone_auth')
+    ]
+    assert len(created) == 2
+    assert all('restart_if_needed' not in z and z['grid_primary'] for z in created)
+    assert not restart.called
+    requests_mock.post(url, status_code=500)
+    hooks[0][0]()
+    assert (
+        'zones still waiting for a restart: 12.11.10.in-addr.arpa., create.tests.'
+        in caplog.text
+    )
+    restart = requests_mock.post(url)
+    hooks[0][0]()
+    hooks[0][0]()
+    assert restart.call_count == 1
+    assert restart.last_request.json()['restart_option'] == 'RESTART_IF_NEEDED'
+    assert restart.last_request.json()['service_option'] == 'DNS'
+
+
+def test_async_deferred_restart(
+    provider_factory, requests_mock, aio_grid, new_zone_name
+):
+    fields = {'restart_if_needed': True}
+    provider = provider_factory(
+        use_async=True, new_zone_fields=fields, defer_restart=True
+    )
+    requests_mock.get('/wapi/v1.0/grid', json=[{'_ref': 'grid/Infoblox'}])
+    restart = requests_mock.post('/wapi/v1.0/grid/Infoblox?_function=restartservices')
+    for name in (new_zone_name, '12.11.10.in-addr.arpa.'):
+        provider.apply(provider.plan(Zone(name, [])))
+    assert not restart.called and len(provider.conn.restart_zones) == 2
+    provider.apply_plans([provider.plan(Zone(new_zone_name, []))])
+    assert restart.call_count == 1 and not provider.conn.restart_zones
+
+
+def test_csv_import(
+    provider_factory, requests_mock, zone_name, monkeypatch, caplog
+):
+    monkeypatch.setattr('octoblox.time.sleep', lambda seconds: None)
+    provider = provider_factory(
+        csv_import_threshold=1, read_endpoints=['member.non.existent']
+    )
+    files = 'https://non.existent/http_direct_file_io'
+    requests_mock.post(
+        '/wapi/v1.0/fileop?_function=uploadinit',
+        json={'url': f'{files}/req_id-UPLOAD-1/octoblox.csv', 'token': 'upload'},
+    )
+    upload = requests_mock.post(f'{files}/req_id-UPLOAD-1/octoblox.csv')
+    requests_mock.post(
+        '/wapi/v1.0/fileop?_function=csv_import',
+        json={
+            'csv_import_task': {
+                '_ref': 'csvimporttask/1',
+                'import_id': 1,
+                'status': 'PENDING',
+            }
+        },
+    )
+    task = {'_ref': 'csvimporttask/1', 'import_id': 1}
+    requests_mock.get(
+        '/wapi/v1.0/csvimporttask/1',
+        [
+            {'json': {**task, 'status': 'RUNNING'}},
+            {'json': {**task, 'status': 'COMPLETED', 'lines_failed': 0}},
+        ],
+    )
+    expected = Zone(zone_name, [])
+    source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+    source.populate(expected)
+    requests_mock.reset_mock()
+    provider.apply(provider.plan(expected))
+    body = upload.last_request.text
+    assert 'header-arecord,IMPORT-ACTION,fqdn*,address*,ttl,view' in body
+    for row in (
+        'arecord,D,xyz.unit.tests,192.168.0.1,,',
+        'arecord,I,a.unit.tests,1.2.3.4,,',
+        'cnamerecord,D,cname.unit.tests,example.unit.tests,,',
+        'cnamerecord,I,cname.unit.tests,example2.unit.tests,,',
+        'arecord,O,www.unit.tests,192.168.0.2,3600,',
+    ):
+        assert row in body.splitlines()
+    polls = [r for r in requests_mock.request_history if 'csvimporttask' in r.path]
+    assert len(polls) == 2 and {r.hostname for r in polls} == {'non.existent'}
+    written = {
+        r.path.split('/')[3].split(':')[1]
+        for r in requests_mock.request_history
+        if r.method != 'GET' and 'record:' in r.path
+    }
+    assert written == {'a', 'alias'}
+
+    requests_mock.get(
+        '/wapi/v1.0/csvimporttask/1',
+        json={**task, 'status': 'COMPLETED', 'lines_failed': 1},
+    )
+    requests_mock.post(
+        '/wapi/v1.0/fileop?_function=csv_error_log',
+        json={'url': f'{files}/req_id-DOWNLOAD-2/errors.csv', 'token': 'errors'},
+    )
+    requests_mock.get(
+        f'{files}/req_id-DOWNLOAD-2/errors.csv',
+        text='header-cnamerecord,fqdn*,canonical_name*,error\n'
+        'cnamerecord,cname.unit.tests,example2.unit.tests,"Duplicate object"\n'
+        'arecord,unknown.unit.tests,10.0.0.1,"Not ours"\n',
+    )
+    done = requests_mock.post('/wapi/v1.0/fileop?_function=downloadcomplete')
+    with pytest.raises(ApplyError) as e:
+        provider.apply(provider.plan(expected))
+    assert [(n, str(error)) for n, error in e.value.failures] == [
+        ('cname', 'Duplicate object')
+    ]
+    assert done.last_request.json() == {'token': 'errors'}
+
+    requests_mock.get('/wapi/v1.0/csvimporttask/1', json={**task, 'status': 'FAILED'})
+    with pytest.raises(ApplyError, match='csv import FAILED') as e:
+        provider.apply(provider.plan(expected))
+    assert {n for n, _ in e.value.failures} == {'a', 'cname', 'www', 'xyz'}
+    assert re.search(r"'octoblox\.csv \(8 rows, \d+ bytes\)'", caplog.text)
+    assert 'arecord,I,a.unit.tests' not in caplog.text
+    requests_mock.reset_mock()
+    provider._apply_csv(zone_name[:-1], [], 28800)
+    assert not requests_mock.called
+
+    stuck = provider_factory(csv_import_threshold=1, csv_import_timeout=0)
+    with pytest.raises(ApplyError, match='csv import still PENDING after 0s') as e:
+        stuck.apply(stuck.plan(expected))
+    assert {n for n, _ in e.value.failures} == {'a', 'cname', 'www', 'xyz'}
+
+
+def test_csv_export(provider_factory, requests_mock, zone_name):
+    rest = Zone(zone_name, [])
+    provider_factory().populate(rest, lenient=True)
+    provider = provider_factory(
+        populate_engine='csv_export', read_endpoints=['member.non.existent']
+    )
+    fallback = provider_factory(populate_engine='csv_export')
+    rows = record_data(zone_name[:-1])
+    files = 'https://non.existent/http_direct_file_io'
+
+    def export(request, context):
+        object = request.json()['_object'].split(':')[-1]
+        return {'url': f'{files}/req_id-DOWNLOAD-{object}/export.csv', 'token': object}
+
+    def exported(request, context):
+        type = request.path.split('-')[-1].split('/')[0].upper()
+        object, columns = csv_types[type]
+        lines = [
+            ','.join(
+                ['header-' + object, 'fqdn*', *columns.values(), 'ttl', 'creator']
+            ),
+            ','.join(['othertype', 'ignored']),
+            ','.join([object, 'dynamic', *('1' for _ in columns), '', 'DYNAMIC']),
+            '',
+        ]
+        for row in rows.get(type, []):
+            fields = [str(row[f]) for f in columns]
+            ttl = str(row['ttl']) if row.get('use_ttl') else ''
+            lines.append(','.join([object, row['name'], *fields, ttl, 'STATIC']))
+        return '\n'.join(lines)
+
+    exports = requests_mock.post('/wapi/v1.0/fileop?_function=csv_export', json=export)
+    requests_mock.get(re.compile(f'{files}/req_id-DOWNLOAD-'), text=exported)
+    done = requests_mock.post('/wapi/v1.0/fileop?_function=downloadcomplete')
+    zone = Zone(zone_name, [])
+    provider.populate(zone, lenient=True)
+    assert sorted((r.name, r._type, r.data) for r in zone.records) == sorted(
+        (r.name, r._type, r.data) for r in rest.records
+    )
+    assert done.call_count == exports.call_count == len(csv_types)
+
+    expected = Zone(zone_name, [])
+    source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+    source.populate(expected)
+    requests_mock.reset_mock()
+    provider.apply(provider.plan(expected))
+    written = [
+        r for r in requests_mock.request_history if r.method in ('PUT', 'DELETE')
+    ]
+    assert written and all('/record:' in r.path for r in written)
+    lookups = [r for r in requests_mock.request_history if 'name' in r.qs]
+    assert lookups and {r.hostname for r in lookups} == {'non.existent'}
+
+    requests_mock.post('/wapi/v1.0/fileop?_function=csv_export', status_code=400)
+    requests_mock.reset_mock()
+    zone = Zone(zone_name, [])
+    fallback.populate(zone, lenient=True)
+    assert len(zone.records) == len(rest.records)
+    assert sum('csv_export' in r.url for r in requests_mock.request_history) == 1
+
+
+def test_lazy_discovery(provider_factory, requests_mock, monkeypatch, caplog):
+    provider = provider_factory()
+    assert not requests_mock.called
+    assert hasattr(provider, 'SUPPORTS') and not requests_mock.called
+    assert provider.conn.apiver == '1.0' and 'A' in provider.SUPPORTS
+    assert sorted(provider.SUPPORTS) == sorted(provider.conn.get_supported_types())
+    assert provider.SUPPORTS & {'A', 'SPF'} == {'A'}
+    assert {'A', 'SPF'} & provider.SUPPORTS == {'A'}
+    assert requests_mock.call_count == 1
+
+    supported = provider.conn.get_supported_types()
+    monkeypatch.setattr(
+        provider.conn, 'get_schema', lambda *args: pytest.fail('rescanned schema')
+    )
+    assert 'A' in provider.SUPPORTS and len(provider.SUPPORTS) == len(supported)
+    assert provider.conn.get_supported_types() is supported
+    monkeypatch.undo()
+    provider.conn.invalidate_schema()
+    assert provider.conn.supported_types is None
+    assert provider.conn.get_supported_types() == supported
+
+    restricted = provider_factory(record_types=['A', 'CNAME'])
+    assert restricted.SUPPORTS == {'A', 'CNAME'}
+    assert restricted.supported.types() is restricted.supported.types()
+
+    warm = provider_factory(warm_up=True)
+    warm.warming.join()
+    requests_mock.reset_mock()
+    assert len(warm.SUPPORTS) and not requests_mock.called
+
+    def unavailable(self):
+        raise requests.ConnectionError('grid unavailable')
+
+    monkeypatch.setattr('octoblox.InfoBlox.get_supported_types', unavailable)
+    provider_factory(warm_up=True).warming.join()
+    assert 'retrying on first use: grid unavailable' in caplog.text
+
+
+def test_concurrent_plans(provider_factory, requests_mock):
+    provider = provider_factory(batch_size=10)
+    threads = set()
+
+    def get_zone(request, context):
+        fqdn = request.qs['fqdn'][0]
+        return [{'_ref': f'zone_auth/{fqdn}', 'fqdn': fqdn, 'soa_default_ttl': 3600}]
+
+    def get_records(request, context):
+        threads.add(threading.get_ident())
+        if not request.path.endswith('/record:a'):
+            return {'result': []}
+        zone = request.qs['zone'][0]
+        return {
+            'result': [
+                {
+                    '_ref': f'record:a/{zone}',
+                    'name': f'www.{zone}',
+                    'ipv4addr': '192.0.2.1',
+                    'use_ttl': False,
+                }
+            ]
+        }
+
+    requests_mock.get(re.compile('/wapi/v1.0/zone_auth'), json=get_zone)
+    requests_mock.get(re.compile('/wapi/v1.0/record:\\w+'), json=get_records)
+
+    def plan(i):
+        zone = Zone(f'zone{i}.tests.', [])
+        value = '192.0.2.1' if i % 2 else '192.0.2.2'
+        zone.add_record(
+            Record.new(zone, 'www', {'type': 'A', 'ttl': 3600, 'value': value})
+        )
+        return provider.plan(zone)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        plans = [*pool.map(plan, range(200))]
+    assert len(threads) > 1
+    assert [p is None for p in plans] == [bool(i % 2) for i in range(200)]
+    assert all(len(p.changes) == 1 for p in plans if p)
+    assert provider.metrics()['GET zone_auth']['requests'] == 200
+    assert provider.metrics()['GET schema']['requests'] == 1
+
+
+def test_read_endpoints(provider_factory, requests_mock, zone_name):
+    members = ['member1.non.existent', 'member2.non.existent']
+    provider = provider_factory(read_endpoints=members)
+    rows = record_data(zone_name[:-1])['A']
+
+    def paged(request, context):
+        if '_page_id' in request.qs:
+            return {'result': rows[1:]}
+        return {'result': rows[:1], 'next_page_id': request.hostname}
+
+    requests_mock.get(re.compile('/record:a\\?'), json=paged)
+    expected = Zone(zone_name, [])
+    source = YamlProvider('test', os.path.join(os.path.dirname(__file__), 'config'))
+    source.populate(expected)
+    provider.apply(provider.plan(expected))
+    history = requests_mock.request_history
+    reads = {r.hostname for r in history if r.method == 'GET' and r.query != '_schema'}
+    assert reads == {*members}
+    pages = [r for r in history if '_page_id' in r.qs]
+    assert pages and all(r.qs['_page_id'] == [r.hostname] for r in pages)
+    assert {r.hostname for r in history if r.method != 'GET'} == {'non.existent'}
+
+
+def test_hedged_reads(provider_factory, requests_mock, monkeypatch, zone_name):
+    members = ['member1.non.existent', 'member2.non.existent']
+    provider = provider_factory(read_endpoints=members, hedge_after=0.05, max_retries=0)
+    fetch = provider.conn.fetch
+
+    def slow(url, kwargs):
+        if members[0] in url:
+            time.sleep(0.5)
+        return fetch(url, kwargs)
+
+    def zone(request, context):
+        return [{'_ref': f'zone_auth/{request.hostname}', 'soa_default_ttl': 3600}]
+
+    monkeypatch.setattr(provider.conn, 'fetch', slow)
+    zones = re.compile('/wapi/v1.0/zone_auth\\?')
+    requests_mock.get(zones, json=zone)
+    assert provider.conn.get_zone(zone_name)[0]['_ref'] == f'zone_auth/{members[1]}'
+    assert provider.conn.get_zone(zone_name)[0]['_ref'] == f'zone_auth/{members[1]}'
+    assert provider.metrics()['GET zone_auth']['hedges'] == 1
+
+    requests_mock.get(zones, exc=requests.ConnectTimeout)
+    with pytest.raises(requests.ConnectTimeout):
+        provider.conn.get_zone(zone_name)
+
+
+def test_retry(provider_factory, requests_mock, zone_name):
+    provider = provider_factory(retry_backoff=0.001)
+    zones = re.compile('/wapi/v1.0/zone_auth\\?')
+    zone = [{'_ref': 'zone_auth/unit', 'soa_default_ttl': 3600}]
+    requests_mock.get(
+        zones,
+        [
+            {'status_code': 429, 'headers': {'Retry-After': '0'}},
+            {'exc': requests.ConnectionError},
+            {'status_code': 503},
+            {'json': zone},
+        ],
+    )
+    assert provider.conn.get_zone(zone_name) == zone
+    assert provider.metrics()['GET zone_auth']['retries'] == 3
+
+    requests_mock.get(zones, exc=requests.ConnectionError)
+    with pytest.raises(requests.ConnectionError):
+        provider.conn.get_zone(zone_name)
+    assert provider.metrics()['GET zone_auth']['retries'] == 6
+
+    records = re.compile('/wapi/v1.0/record:a')
+    requests_mock.post(records, [{'status_code': 429}, {'status_code': 201}])
+    provider.conn.post('record:a', json={})
+    requests_mock.post(records, status_code=502)
+    with pytest.raises(requests.HTTPError):
+        provider.conn.post('record:a', json={})
+    requests_mock.post(records, exc=requests.ConnectionError)
+    with pytest.raises(requests.ConnectionError):
+        provider.conn.post('record:a', json={})
+    assert provider.metrics()['POST record:a']['retries'] == 1
+
+
+def test_async_retry(provider_factory):
+    aioresponses = pytest.importorskip('aioresponses')
+    provider = provider_factory(use_async=True, retry_backoff=0.001)
+    url = 'https://non.existent/wapi/v1.0/zone_auth'
+    zone = [{'_ref': 'zone_auth/unit', 'soa_default_ttl': 3600}]
+    with aioresponses.aioresponses() as mock:
+        mock.get(url, status=503, headers={'Retry-After': '0'})
+        mock.get(url, payload=zone)
+        assert provider._run_async(lambda c: c.request('GET', 'zone_auth')) == zone
+    assert provider.metrics()['GET zone_auth']['retries'] == 1
+
+    aiohttp = pytest.importorskip('aiohttp')
+    provider = provider_factory(use_async=True, retry_backoff=0.001)
+    with aioresponses.aioresponses() as mock:
+        mock.get(url, exception=aiohttp.ClientConnectionError())
+        mock.get(url, payload=zone)
+        mock.post(url, exception=aiohttp.ClientConnectionError())
+        assert provider._run_async(lambda c: c.request('GET', 'zone_auth')) == zone
+        with pytest.raises(aiohttp.ClientConnectionError):
+            provider._run_async(lambda c: c.request('POST', 'zone_auth', json={}))
+    assert provider.metrics()['GET zone_auth']['retries'] == 1
+    assert provider.conn.throttle.active == 0
+
+
+def test_async_throttle(provider_factory):
+    aioresponses = pytest.importorskip('aioresponses')
+    provider = provider_factory(
+        use_async=True, rate_limit=200, rate_burst=1, max_concurrency=2
+    )
+    throttle = provider.conn.throttle
+    url = re.compile(r'https://non\.existent/wapi/v1\.0/zone_auth.*')
+    peak = []
+
+    def callback(url, **kwargs):
+        peak.append(throttle.active)
+
+    async def fan_out(client):
+        return await asyncio.gather(
+            *(client.request('GET', 'zone_auth', {'n': n}) for n in range(8))
+        )
+
+    start = time.monotonic()
+    with aioresponses.aioresponses() as mock:
+        mock.get(url, payload=[], callback=callback, repeat=True)
+        assert provider._run_async(fan_out) == [[]] * 8
+    assert len(peak) == 8 and max(peak) <= 2 and throttle.active == 0
+    assert time.monotonic() - start >= 0.03
+
+    # a slot freed by another thread wakes a waiting coroutine
+    throttle = Throttle(concurrency=1)
+    started = throttle.acquire()
+    threading.Timer(0.02, throttle.release, (started, False)).start()
+    assert asyncio.new_event_loop().run_until_complete(throttle.acquire_async())
+    assert throttle.active == 1 and not throttle.waiters
+
+
+def test_throttle(monkeypatch):
+    throttle = Throttle(concurrency=4)
+    started = throttle.acquire()
+    throttle.release(started, True)
+    assert throttle.limit == 2
+    throttle.release(started, True)
+    assert throttle.limit == 2
+    throttle.release(throttle.acquire(), False)
+    assert throttle.limit == 2.5
+
+    throttle = Throttle(concurrency=4, latency_target=0.01)
+    started = throttle.acquire()
+    time.sleep(0.02)
+    throttle.release(started, False)
+    assert throttle.limit == 2
+
+    throttle = Throttle(concurrency=1)
+    started = throttle.acquire()
+    waiting = threading.Thread(target=throttle.acquire)
+    waiting.start()
+    waiting.join(0.05)
+    assert waiting.is_alive()
+    throttle.release(started, False)
+    waiting.join()
+    assert throttle.active == 1
+
+    throttle = Throttle(rate=100, burst=1)
+    start = time.monotonic()
+    for _ in range(3):
+        throttle.acquire()
+    assert time.monotonic() - start >= 0.015
+
+    throttle = Throttle(rate=200, burst=1, concurrency=2)
+    peak = []
+
+    def hold():
+        started = throttle.acquire()
+        peak.append(throttle.active)
+        time.sleep(0.02)
+        throttle.release(started, False)
+
+    threads = [threading.Thread(target=hold) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(peak) == 8 and max(peak) <= 2
+
+    monkeypatch.setattr('random.uniform', lambda a, b: b)
+    throttle = Throttle(backoff=1, backoff_max=5)
+    assert [throttle.delay(i) for i in range(4)] == [1, 2, 4, 5]
+    assert throttle.delay(0, '3') == 3 and throttle.delay(0, '60') == 5
+    assert throttle.delay(0, 'Wed, 21 Oct 2015 07:28:00 GMT') == 1
+    assert throttle.delay(0, 'soon') == 1
+
+
+def record_reads(requests_mock):
+    return {
+        r.path.split('/')[-1]
+        for r in requests_mock.request_history
+        if '/record:' in r.path
+    }
+
+
+def test_writers(zone_name):
+    zone = Zone(zone_name, [])
+    mx = Record.new(
+        zone,
+        '',
+        {'type': 'MX', 'ttl': 60, 'value': {'preference': 10, 'exchange': 'mx.x.'}},
+    ).values[0]
+    fields = {'preference': 10, 'mail_exchanger': 'mx.x'}
+    assert writers['MX'](mx, 60, 3600) == {**fields, 'use_ttl': True, 'ttl': 60}
+    assert field_writers['MX'](mx) == fields
+    assert writers['NS']('ns.x.', 60, 3600) == {'nameserver': 'ns.x'}
+    assert field_writers['A']('10.0.0.1') == {'ipv4addr': '10.0.0.1'}
+
+
+def test_record_types(provider_factory, requests_mock, zone_name):
+    provider = provider_factory(record_types=['A', 'CNAME'])
+    assert sorted(provider.SUPPORTS) == ['A', 'CNAME']
+    provider.populate(Zone(zone_name, []), lenient=True)
+    assert record_reads(requests_mock) == {'record:a', 'record:cname'}
+    with pytest.raises(ValueError, match='Unknown record type: TLSA'):
+        provider_factory(record_types=['TLSA'])
+
+
+def test_desired_types_only(provider_factory, requests_mock, zone_name):
+    provider = provider_factory(desired_types_only=True, managed_types=['CNAME'])
+    desired = Zone(zone_name, [])
+    desired.add_record(
+        Record.new(desired, 'xyz', {'type': 'A', 'ttl': 28800, 'value': '192.168.0.1'})
+    )
+    plan = provider.plan(desired)
+    assert record_reads(requests_mock) == {'record:a', 'record:cname'}
+    assert sorted((type(c).__name__, c.record._type) for c in plan.changes) == [
+        ('Delete', 'A'),
+        ('Delete', 'CNAME'),
+    ]
+    requests_mock.reset_mock()
+    provider.populate(Zone(zone_name, []), lenient=True)
+    assert len(record_reads(requests_mock)) == len(provider.SUPPORTS)